@@ -1,6 +1,151 @@
+import csv
+import html
+import json
 import os
 import sqlite3
-from typing import Optional, Dict, Any
+import threading
+from itertools import islice
+from typing import Optional, Dict, Any, Iterable
+
+# Настройки соединений: WAL — читатели не блокируются писателем; synchronous=NORMAL в WAL
+# не теряет целостность при сбое (в худшем случае — последние транзакции); кэш страниц 64 МБ
+# и mmap 256 МБ держат горячую часть базы в памяти.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+
+UZI_COLUMNS = (
+    'vc', 'data_isl', 'number_protocol', 'FIO', 'gender', 'date_birth',
+    'number_med_card', 'napr_otd', 'vid_issled', 'vc_type', 'scaner', 'datchik',
+    'opisanie', 'zakl', 'fio_vrach', 'hospital_did',
+)
+
+INSERT_UZI_SQL = f"INSERT INTO UZI ({', '.join(UZI_COLUMNS)}) VALUES ({', '.join('?' * len(UZI_COLUMNS))})"
+
+UZI_ROW_FIELDS = UZI_COLUMNS + ('created_at', 'updated_at')
+
+# Большие текстовые колонки: в списки не выбираются, подгружаются по обращению
+UZI_TEXT_COLUMNS = ('opisanie', 'zakl')
+UZI_LIGHT_COLUMNS = tuple(column for column in UZI_ROW_FIELDS if column not in UZI_TEXT_COLUMNS)
+
+class UziRecord:
+    """
+    Запись УЗИ с доступом к полям по имени (record.FIO, record.data_isl, ...).
+
+    Создаётся из строки запроса с явным списком колонок. Если opisanie/zakl не были
+    выбраны (списки), они загружаются одним запросом при первом обращении к любому из них
+    через соединение текущего потока с базой db_path.
+    """
+
+    __slots__ = UZI_ROW_FIELDS + ('_db_path',)
+
+    def __init__(self, columns, row, db_path: Optional[str] = None):
+        for column, value in zip(columns, row):
+            setattr(self, column, value)
+        self._db_path = db_path
+
+    def __getattr__(self, name):
+        # вызывается только для незаполненных слотов, т.е. колонок, не выбранных запросом
+        if name in UZI_TEXT_COLUMNS:
+            self.load_text()
+            return object.__getattribute__(self, name)
+        raise AttributeError(f"Колонка {name} не выбрана запросом")
+
+    def load_text(self) -> None:
+        if self._db_path is None:
+            raise AttributeError("Текст исследования не выбран, и база для подгрузки не задана")
+        cursor = get_connection(self._db_path).cursor()
+        cursor.execute(f"SELECT {', '.join(UZI_TEXT_COLUMNS)} FROM UZI WHERE vc = ?", (self.vc,))
+        row = cursor.fetchone() or (None,) * len(UZI_TEXT_COLUMNS)
+        for column, value in zip(UZI_TEXT_COLUMNS, row):
+            setattr(self, column, value)
+
+    def values(self) -> tuple:
+        """Все поля в порядке колонок таблицы (подгружает текст при необходимости)."""
+        return tuple(getattr(self, column) for column in UZI_ROW_FIELDS)
+
+    def to_dict(self, columns=UZI_ROW_FIELDS) -> dict:
+        return {column: getattr(self, column) for column in columns}
+
+    def __getstate__(self):
+        # незагруженные колонки не сохраняются и после распаковки подгружаются так же лениво
+        return {slot: getattr(self, slot) for slot in self.__slots__ if self._is_set(slot)}
+
+    def __setstate__(self, state):
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    def _is_set(self, slot: str) -> bool:
+        try:
+            object.__getattribute__(self, slot)
+            return True
+        except AttributeError:
+            return False
+
+    def __repr__(self):
+        return f"UziRecord(vc={self.vc!r}, number_protocol={self.number_protocol!r}, data_isl={self.data_isl!r})"
+
+
+_schema_lock = threading.Lock()
+_schema_ready = set()
+_local = threading.local()
+
+
+def configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def ensure_schema(db_name: str = "Hospital.db") -> None:
+    """
+    Создаёт таблицы и индексы (create_database) один раз на процесс для данного файла базы.
+    """
+    key = os.path.abspath(db_name)
+    if key in _schema_ready:
+        return
+    with _schema_lock:
+        if key in _schema_ready:
+            return
+        create_database(db_name).close()
+        _schema_ready.add(key)
+
+
+def get_connection(db_name: str = "Hospital.db") -> sqlite3.Connection:
+    """
+    Долгоживущее соединение текущего потока с базой db_name.
+
+    sqlite3.Connection нельзя делить между потоками, поэтому у каждого потока своё
+    соединение, которое переиспользуется всеми HospitalDBManager этого потока.
+    После fork (pid сменился) соединения родителя не используются.
+    """
+    ensure_schema(db_name)
+    key = os.path.abspath(db_name)
+    connections = getattr(_local, "connections", None)
+    if connections is None or _local.pid != os.getpid():
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = configure_connection(sqlite3.connect(db_name, timeout=30))
+    return conn
+
+
+def close_connection(db_name: str = "Hospital.db") -> None:
+    """
+    Закрывает соединение текущего потока (например, при завершении рабочего потока).
+    """
+    connections = getattr(_local, "connections", None)
+    if connections and _local.pid == os.getpid():
+        conn = connections.pop(os.path.abspath(db_name), None)
+        if conn is not None:
+            conn.close()
 
 def drop_table(db_name: str = "Hospital.db") -> sqlite3.Connection:
     try:
@@ -17,7 +162,11 @@ def drop_table(db_name: str = "Hospital.db") -> sqlite3.Connection:
         DROP TABLE IF EXISTS Metadata 
         ''')
 
-        # Уничтожаем таблицу UZI (УЗИ исследования)
+        # Уничтожаем полнотекстовый индекс и таблицу UZI (УЗИ исследования)
+        cursor.execute('''
+        DROP TABLE IF EXISTS UZI_FTS 
+        ''')
+
         cursor.execute('''
         DROP TABLE IF EXISTS UZI 
         ''')
@@ -33,6 +182,98 @@ def drop_table(db_name: str = "Hospital.db") -> sqlite3.Connection:
     except sqlite3.Error as e:
         print(f"Ошибка при удалении таблиц: {e}")
     raise
+def _fts_normalized(column: str) -> str:
+    # unicode61 снимает диакритику только с латиницы, поэтому «ё» приводим к «е» сами;
+    # замена не меняет число токенов, так что snippet по исходному тексту остаётся точным
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def create_fulltext_index(cursor: sqlite3.Cursor) -> None:
+    """
+    Полнотекстовый индекс FTS5 по описанию и заключению УЗИ.
+
+    UZI_FTS — external content таблица (текст хранится только в UZI, rowid = vc),
+    синхронизируется триггерами на INSERT/UPDATE/DELETE. Токенизатор unicode61 приводит
+    кириллицу к нижнему регистру, «ё» индексируется как «е»; префиксный индекс ускоряет
+    запросы вида «стеноз*». Для уже заполненной базы индекс строится один раз при создании.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'UZI_FTS'")
+    exists = cursor.fetchone() is not None
+
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS UZI_FTS USING fts5(
+        opisanie,
+        zakl,
+        content='UZI',
+        content_rowid='vc',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    ''')
+
+    new_values = f"new.vc, {_fts_normalized('new.opisanie')}, {_fts_normalized('new.zakl')}"
+    old_values = f"old.vc, {_fts_normalized('old.opisanie')}, {_fts_normalized('old.zakl')}"
+
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS uzi_fts_insert AFTER INSERT ON UZI BEGIN
+        INSERT INTO UZI_FTS(rowid, opisanie, zakl) VALUES ({new_values});
+    END
+    ''')
+
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS uzi_fts_delete AFTER DELETE ON UZI BEGIN
+        INSERT INTO UZI_FTS(UZI_FTS, rowid, opisanie, zakl) VALUES ('delete', {old_values});
+    END
+    ''')
+
+    # только при изменении индексируемых полей: правка остальных колонок не трогает индекс
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS uzi_fts_update AFTER UPDATE OF vc, opisanie, zakl ON UZI BEGIN
+        INSERT INTO UZI_FTS(UZI_FTS, rowid, opisanie, zakl) VALUES ('delete', {old_values});
+        INSERT INTO UZI_FTS(rowid, opisanie, zakl) VALUES ({new_values});
+    END
+    ''')
+
+    if not exists:
+        # ранжирование по умолчанию (колонка rank): совпадение в заключении весит вдвое больше;
+        # ORDER BY rank выполняется внутри FTS5, и JOIN с UZI делается только для LIMIT строк
+        cursor.execute("INSERT INTO UZI_FTS(UZI_FTS, rank) VALUES ('rank', 'bm25(1.0, 2.0)')")
+        cursor.execute(f'''
+        INSERT INTO UZI_FTS(rowid, opisanie, zakl)
+        SELECT vc, {_fts_normalized('opisanie')}, {_fts_normalized('zakl')} FROM UZI
+        ''')
+
+
+def fts_query(text: str) -> str:
+    """
+    Пользовательский текст -> запрос FTS5: каждое слово ищется по префиксу
+    («стеноз» найдёт и «стенозирующего»), все слова обязательны. Спецсимволы FTS5
+    экранируются кавычками, поэтому ввод не может сломать синтаксис запроса.
+    """
+    terms = []
+    for word in text.replace('ё', 'е').replace('Ё', 'Е').split():
+        word = word.strip('"*')
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"*')
+    return " AND ".join(terms)
+
+
+# Границы совпадений в snippet: символы из Private Use Area, которых нет в тексте протоколов;
+# текст экранируется как HTML, и только потом маркеры заменяются на <b>...</b>
+SNIPPET_OPEN = "\ue000"
+SNIPPET_CLOSE = "\ue001"
+
+
+def snippet_html(snippet: Optional[str]) -> Optional[str]:
+    """
+    Фрагмент snippet() с маркерами SNIPPET_OPEN/SNIPPET_CLOSE -> безопасный HTML: исходный текст
+    экранирован, найденные слова выделены <b>...</b>.
+    """
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(SNIPPET_OPEN, "<b>").replace(SNIPPET_CLOSE, "</b>")
+
+
 def create_database(db_name: str = "Hospital.db") -> sqlite3.Connection:
     """
 
@@ -68,9 +309,8 @@ def create_database(db_name: str = "Hospital.db") -> sqlite3.Connection:
         conn = sqlite3.connect(db_name)
         cursor = conn.cursor()
 
-        # Включаем поддержку внешних ключей
-        cursor.execute('''
-        PRAGMA foreign_keys = ON;''')
+        # Включаем поддержку внешних ключей, WAL и остальные настройки соединения
+        configure_connection(conn)
 
         # Создаем таблицу Metadata (Метаданные)
         cursor.execute('''
@@ -127,9 +367,28 @@ def create_database(db_name: str = "Hospital.db") -> sqlite3.Connection:
         ON UZI(FIO)
         ''')
 
+        # Составные индексы для search_uzi: фильтр + сортировка по дате без отдельной сортировки
+        # (vc — rowid, SQLite хранит его в конце каждого индекса, поэтому порядок (data_isl, vc) тоже покрыт)
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_uzi_fio_data_isl
+        ON UZI(FIO, data_isl)
+        ''')
+
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_uzi_number_med_card_data_isl
+        ON UZI(number_med_card, data_isl)
+        ''')
+
+        # заменяет idx_uzi_hospital_did: префикс (hospital_did) покрывает те же выборки
+        cursor.execute('DROP INDEX IF EXISTS idx_uzi_hospital_did')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_uzi_hospital_did_data_isl
+        ON UZI(hospital_did, data_isl)
+        ''')
+
         cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_uzi_hospital_did 
-        ON UZI(hospital_did)
+        CREATE INDEX IF NOT EXISTS idx_uzi_vc_type_data_isl
+        ON UZI(vc_type, data_isl)
         ''')
 
         cursor.execute('''
@@ -137,6 +396,8 @@ def create_database(db_name: str = "Hospital.db") -> sqlite3.Connection:
         ON Metadata(hospital_name)
         ''')
 
+        create_fulltext_index(cursor)
+
         conn.commit()
 
         if db_exists:
@@ -328,8 +589,13 @@ class HospitalDBManager:
     УЗИ
     """
 
-    def __init__(self, db_path: str = "Hospital.db"):
+    def __init__(self, db_path: str = "Hospital.db", persistent: bool = True):
+        """
+        persistent=True — использовать долгоживущее соединение потока (get_connection),
+        схема создаётся один раз на процесс; False — отдельное соединение, закрываемое в disconnect.
+        """
         self.db_path = db_path
+        self.persistent = persistent
         self.conn = None
 
     def __enter__(self):
@@ -346,7 +612,10 @@ class HospitalDBManager:
     базе
     данных
     """
-        self.conn = create_database(self.db_path)
+        if self.persistent:
+            self.conn = get_connection(self.db_path)
+        else:
+            self.conn = create_database(self.db_path)
 
     def disconnect(self) -> None:
         """
@@ -355,9 +624,13 @@ class HospitalDBManager:
     базы
     данных
     """
-        if self.conn:
+        if self.conn and not self.persistent:
             self.conn.close()
             print("\nСоединение с базой данных закрыто")
+        elif self.conn and self.conn.in_transaction:
+            # соединение остаётся открытым для следующих запросов потока — незавершённое откатываем
+            self.conn.rollback()
+        self.conn = None
 
     def add_record(self, base_name, record_data: Dict[str, Any]) -> int:
         """
@@ -382,32 +655,9 @@ class HospitalDBManager:
             cursor = self.conn.cursor()
             if base_name=="UZI":
                 # Подготавливаем данные для вставки
-                data = (
-                    record_data.get('vc'),
-                    record_data.get('data_isl'),
-                    record_data.get('number_protocol'),
-                    record_data.get('FIO'),
-                    record_data.get('gender'),
-                    record_data.get('date_birth'),
-                    record_data.get('number_med_card'),
-                    record_data.get('napr_otd'),
-                    record_data.get('vid_issled'),
-                    record_data.get('vc_type'),
-                    record_data.get('scaner'),
-                    record_data.get('datchik'),
-                    record_data.get('opisanie'),
-                    record_data.get('zakl'),
-                    record_data.get('fio_vrach'),
-                    record_data.get('hospital_did')
-                )
-
-                cursor.execute('''
-                INSERT INTO '''+base_name+''' (
-                    vc, data_isl, number_protocol, FIO, gender, date_birth,
-                    number_med_card, napr_otd, vid_issled, vc_type, scaner, datchik,
-                    opisanie, zakl, fio_vrach, hospital_did
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', data)
+                data = tuple(record_data.get(column) for column in UZI_COLUMNS)
+
+                cursor.execute(INSERT_UZI_SQL, data)
 
                 record_id = cursor.lastrowid
                 self.conn.commit()
@@ -422,6 +672,206 @@ class HospitalDBManager:
             print(f"Ошибка при добавлении записи: {e}")
             return -1
 
+    def add_records(self, records: Iterable[Dict[str, Any]], batch_size: int = 1000, max_errors: int = 1000) -> Dict[str, Any]:
+        """
+        Массовая вставка записей УЗИ одной транзакцией.
+
+        records читается потоково порциями по batch_size и вставляется через executemany.
+        Если порция нарушает ограничения (дубликат vc/number_protocol, NOT NULL, CHECK),
+        она откатывается до SAVEPOINT и вставляется построчно, так что ошибочные строки
+        попадают в отчёт, а остальные — в базу. Элемент records может быть исключением
+        (строка, которую не удалось разобрать) — он тоже попадает в отчёт.
+
+        Returns:
+        dict: {"inserted": int, "failed": int, "errors": [{"row": номер строки с 1, "number_protocol": ..., "error": ...}]}
+        (в errors не больше max_errors записей, failed считает все)
+        """
+        report = {"inserted": 0, "failed": 0, "errors": []}
+
+        def fail(row_number, record, error):
+            report["failed"] += 1
+            if len(report["errors"]) < max_errors:
+                number_protocol = record.get('number_protocol') if isinstance(record, dict) else None
+                report["errors"].append({"row": row_number, "number_protocol": number_protocol, "error": str(error)})
+
+        cursor = self.conn.cursor()
+        iterator = iter(enumerate(records, start=1))
+        try:
+            if not self.conn.in_transaction:
+                cursor.execute("BEGIN")
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+
+                rows = []
+                for row_number, record in batch:
+                    if isinstance(record, Exception):
+                        fail(row_number, record, record)
+                    else:
+                        rows.append((row_number, record, tuple(record.get(column) for column in UZI_COLUMNS)))
+
+                cursor.execute("SAVEPOINT uzi_batch")
+                try:
+                    cursor.executemany(INSERT_UZI_SQL, [data for _, _, data in rows])
+                    cursor.execute("RELEASE uzi_batch")
+                    report["inserted"] += len(rows)
+                    continue
+                except sqlite3.Error:
+                    cursor.execute("ROLLBACK TO uzi_batch")
+                    cursor.execute("RELEASE uzi_batch")
+
+                # в порции есть плохие строки — вставляем по одной, чтобы найти их
+                for row_number, record, data in rows:
+                    try:
+                        cursor.execute(INSERT_UZI_SQL, data)
+                        report["inserted"] += 1
+                    except sqlite3.Error as e:
+                        fail(row_number, record, e)
+
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+        print(f"Импорт УЗИ: добавлено {report['inserted']}, с ошибками {report['failed']}")
+        return report
+
+    def import_csv(self, path: str, batch_size: int = 1000, delimiter: str = ",", encoding: str = "utf-8-sig") -> Dict[str, Any]:
+        """
+        Импорт записей УЗИ из CSV с заголовком (имена колонок как в таблице UZI).
+        Файл читается построчно; пустые значения записываются как NULL.
+        """
+        with open(path, newline="", encoding=encoding) as f:
+            reader = csv.DictReader(f, delimiter=delimiter)
+            records = ({key: (value if value != "" else None) for key, value in row.items()} for row in reader)
+            return self.add_records(records, batch_size=batch_size)
+
+    def import_jsonl(self, path: str, batch_size: int = 1000, encoding: str = "utf-8") -> Dict[str, Any]:
+        """
+        Импорт записей УЗИ из JSON Lines (один объект на строку). Файл читается построчно;
+        строки с некорректным JSON попадают в отчёт об ошибках. Номер строки в отчёте — номер
+        непустой строки файла.
+        """
+        def records(f):
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield ValueError(f"некорректный JSON: {e}")
+                    continue
+                yield record if isinstance(record, dict) else ValueError("ожидается JSON-объект")
+
+        with open(path, encoding=encoding) as f:
+            return self.add_records(records(f), batch_size=batch_size)
+
+    def _search_uzi_query(self, fio: Optional[str] = None, fio_prefix: Optional[str] = None,
+                          number_med_card: Optional[int] = None, date_from: Optional[str] = None,
+                          date_to: Optional[str] = None, hospital_did: Optional[str] = None,
+                          vc_type: Optional[int] = None, after: Optional[tuple] = None, limit: int = 50,
+                          columns: tuple = UZI_LIGHT_COLUMNS) -> tuple:
+        conditions, params = self._uzi_filter(date_from=date_from, date_to=date_to,
+                                              hospital_did=hospital_did, vc_type=vc_type)
+        if fio is not None:
+            conditions.append("FIO = ?")
+            params.append(fio)
+        if fio_prefix:
+            # диапазон вместо LIKE: LIKE без учёта регистра не использует индекс
+            conditions.append("FIO >= ? AND FIO < ?")
+            params += [fio_prefix, fio_prefix + "\U0010ffff"]
+        if number_med_card is not None:
+            conditions.append("number_med_card = ?")
+            params.append(number_med_card)
+        if after is not None:
+            conditions.append("(data_isl, vc) < (?, ?)")
+            params += list(after)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"SELECT {', '.join(columns)} FROM UZI {where} ORDER BY data_isl DESC, vc DESC LIMIT ?"
+        return query, params + [limit]
+
+    def _records(self, cursor: sqlite3.Cursor, columns: tuple) -> list:
+        return [UziRecord(columns, row, self.db_path) for row in cursor.fetchall()]
+
+    def search_uzi(self, limit: int = 50, after: Optional[tuple] = None,
+                   columns: tuple = UZI_LIGHT_COLUMNS, **filters) -> tuple:
+        """
+        Поиск исследований с keyset-пагинацией, от новых к старым по (data_isl, vc).
+
+        Фильтры: fio (точное совпадение), fio_prefix, number_med_card, date_from/date_to по
+        data_isl, hospital_did, vc_type. Каждый фильтр опирается на индекс с порядком по дате
+        (idx_uzi_fio_data_isl, idx_uzi_number_med_card_data_isl, idx_uzi_data_isl,
+        idx_uzi_hospital_did_data_isl, idx_uzi_vc_type_data_isl), и страница читается без сортировки.
+        Исключение — fio_prefix: диапазон по FIO идёт по индексу, но найденные строки упорядочены
+        по FIO, поэтому SQLite сортирует их по дате (USE TEMP B-TREE) — стоимость растёт с числом
+        совпадений префикса. Планы проверяются в tests/test_search_plans.py.
+        after — курсор (data_isl, vc) последней строки предыдущей страницы.
+        columns — выбираемые колонки; по умолчанию без opisanie/zakl (подгружаются лениво).
+
+        Returns:
+        tuple: (список UziRecord, курсор следующей страницы или None)
+        """
+        columns = tuple(dict.fromkeys(('vc', 'data_isl') + tuple(columns)))
+        query, params = self._search_uzi_query(after=after, limit=limit + 1, columns=columns, **filters)
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        records = self._records(cursor, columns)
+
+        # запрашиваем на одну строку больше, чтобы без COUNT узнать, есть ли следующая страница
+        if len(records) > limit:
+            records = records[:limit]
+            return records, (records[-1].data_isl, records[-1].vc)
+        return records, None
+
+    def search_uzi_text(self, text: str, limit: int = 20, offset: int = 0,
+                        hospital_did: Optional[str] = None, snippet_tokens: int = 12) -> list:
+        """
+        Полнотекстовый поиск по описанию и заключению (UZI_FTS), лучшие совпадения первыми.
+
+        Ранжирование bm25 (колонка rank UZI_FTS), совпадение в заключении весит вдвое больше, чем в описании.
+
+        Returns:
+        list: словари {vc, data_isl, number_protocol, FIO, vid_issled, snippet, rank};
+        snippet — HTML: экранированный фрагмент с найденными словами в <b>...</b>; rank — bm25 (меньше — лучше)
+        """
+        query = fts_query(text)
+        if not query:
+            return []
+
+        conditions, params = ["UZI_FTS MATCH ?"], [query]
+        if hospital_did is not None:
+            conditions.append("u.hospital_did = ?")
+            params.append(hospital_did)
+
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+        SELECT u.vc, u.data_isl, u.number_protocol, u.FIO, u.vid_issled,
+               snippet(UZI_FTS, -1, ?, ?, '…', ?) AS snippet,
+               UZI_FTS.rank
+        FROM UZI_FTS
+        JOIN UZI u ON u.vc = UZI_FTS.rowid
+        WHERE {' AND '.join(conditions)}
+        ORDER BY UZI_FTS.rank
+        LIMIT ? OFFSET ?
+        ''', [SNIPPET_OPEN, SNIPPET_CLOSE, snippet_tokens] + params + [limit, offset])
+
+        names = ("vc", "data_isl", "number_protocol", "FIO", "vid_issled", "snippet", "rank")
+        items = [dict(zip(names, row)) for row in cursor.fetchall()]
+        for item in items:
+            item["snippet"] = snippet_html(item["snippet"])
+        return items
+
+    def explain_search_uzi(self, **filters) -> list:
+        """
+        План запроса search_uzi (EXPLAIN QUERY PLAN) — для проверки, что фильтр идёт по индексу.
+        """
+        query, params = self._search_uzi_query(**filters)
+        cursor = self.conn.cursor()
+        cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+        return [row[-1] for row in cursor.fetchall()]
+
     def add_hospital(self, hospital_did : str, name: str, vc_type: int, endpoint: Optional[str] = None) -> int:
         """
         Добавляет
@@ -475,23 +925,83 @@ class HospitalDBManager:
         Returns:
         list: Список
         найденных
-        записей
+        записей (UziRecord со всеми колонками)
         """
         try:
             cursor = self.conn.cursor()
 
-            cursor.execute('''
-            SELECT * FROM UZI 
+            cursor.execute(f'''
+            SELECT {', '.join(UZI_ROW_FIELDS)} FROM UZI 
             WHERE vc=?
             ORDER BY data_isl DESC
             ''', (vc,))
 
-            return cursor.fetchall()
+            return self._records(cursor, UZI_ROW_FIELDS)
 
         except sqlite3.Error as e:
             print(f"Ошибка при поиске: {e}")
         return []
 
+    @staticmethod
+    def _uzi_filter(date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    hospital_did: Optional[str] = None, vc_type: Optional[int] = None) -> tuple:
+        conditions, params = [], []
+        if date_from is not None:
+            conditions.append("data_isl >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("data_isl <= ?")
+            params.append(date_to)
+        if hospital_did is not None:
+            conditions.append("hospital_did = ?")
+            params.append(hospital_did)
+        if vc_type is not None:
+            conditions.append("vc_type = ?")
+            params.append(vc_type)
+        return conditions, params
+
+    def count_uzi(self, up_to_vc: Optional[int] = None, **filters) -> int:
+        """
+        Количество исследований, подходящих под фильтр (date_from/date_to по data_isl, hospital_did, vc_type);
+        up_to_vc — считать только записи с vc <= up_to_vc
+        """
+        conditions, params = self._uzi_filter(**filters)
+        if up_to_vc is not None:
+            conditions.append("vc <= ?")
+            params.append(up_to_vc)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM UZI {where}", params)
+        return cursor.fetchone()[0]
+
+    def iter_uzi_chunks(self, chunk_size: int = 500, after_vc: Optional[int] = None,
+                        columns: tuple = UZI_ROW_FIELDS, **filters):
+        """
+        Порциями (по chunk_size строк) выдаёт исследования, подходящие под фильтр, в порядке vc.
+
+        Используется keyset-пагинация по первичному ключу (vc > последний), поэтому
+        каждая порция — отдельный дешёвый запрос, а в памяти не больше одной порции.
+        after_vc — продолжить после указанного vc (возобновление выгрузки).
+        Порция — список UziRecord с колонками columns (по умолчанию все).
+        """
+        columns = tuple(dict.fromkeys(('vc',) + tuple(columns)))
+        conditions, params = self._uzi_filter(**filters)
+        cursor = self.conn.cursor()
+        last_vc = after_vc
+        while True:
+            page_conditions = conditions + (["vc > ?"] if last_vc is not None else [])
+            page_params = params + ([last_vc] if last_vc is not None else [])
+            where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+            cursor.execute(f"SELECT {', '.join(columns)} FROM UZI {where} ORDER BY vc LIMIT ?",
+                           page_params + [chunk_size])
+            rows = self._records(cursor, columns)
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            last_vc = rows[-1].vc
+
 def main():
     """
     Основная
@@ -519,6 +1029,22 @@ def main():
         # Показать примеры данных
         display_sample_data(conn)
 
+        # Проверка, что поиск с пагинацией использует индексы
+        print("\nПланы запросов search_uzi:")
+        with HospitalDBManager() as db_manager:
+            for filters in (
+                {},
+                {"fio": "Иванов Иван Иванович"},
+                {"fio_prefix": "Иванов"},
+                {"number_med_card": 123456},
+                {"date_from": "2024-01-01", "date_to": "2024-01-31 23:59:59"},
+                {"hospital_did": "M2yeapcDR9P7pi7mETjBui"},
+                {"vc_type": 1},
+                {"fio": "Иванов Иван Иванович", "after": ("2024-01-15 14:30:00", 1)},
+            ):
+                plan = db_manager.explain_search_uzi(**filters)
+                print(f"  {filters}: {'; '.join(plan)}")
+
         # Пример использования менеджера базы данных
         print("\n" + "="*60)
         print("ИСПОЛЬЗОВАНИЕ МЕНЕДЖЕРА БАЗЫ ДАННЫХ")
@@ -585,7 +1111,7 @@ def main():
             print("\nПоиск записей по vc:")
             results = db_manager.search_uzi_by_vc(1)
             for result in results:
-                print(f"  - {result[3]} (Протокол: {result[2]}, Дата: {result[1]}, vc: {result[0]})")
+                print(f"  - {result.FIO} (Протокол: {result.number_protocol}, Дата: {result.data_isl}, vc: {result.vc})")
 
         print("\n" + "="*60)
         print("БАЗА ДАННЫХ УСПЕШНО СОЗДАНА И ПРОТЕСТИРОВАНА")
@@ -1,38 +1,175 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, Response, send_file
+import base64
+import binascii
+import json
 import os
-from doc import generate_medical_pdf, populate_test_data
-from DataBase.work_db import HospitalDBManager
+import shutil
+import tempfile
+from batch_export import export_protocols, STAMP_PATH
+from doc import get_protocol_template, record_from_uzi, populate_test_data, TEMPLATE_VERSION
+from pdf_cache import PdfCache, record_key
+from DataBase.work_db import HospitalDBManager, ensure_schema, UZI_LIGHT_COLUMNS
 app = Flask(__name__)
 
+DB_PATH = os.getenv("HOSPITAL_DB", "Hospital.db")
+
+# схема создаётся один раз при старте, дальше запросы работают через соединения потоков
+ensure_schema(DB_PATH)
+
+pdf_cache = PdfCache(
+    memory_items=int(os.getenv("PDF_CACHE_MEMORY_ITEMS", "128")),
+    disk_dir=os.getenv("PDF_CACHE_DIR", "pdf_cache") or None,
+    disk_max_bytes=int(os.getenv("PDF_CACHE_DISK_MAX_MB", "256")) * 1024 * 1024,
+)
+
+
+def render_protocol(result) -> bytes:
+    # PDF рендерится в память: без общего protocol.pdf на диске параллельные запросы не мешают друг другу
+    return get_protocol_template(STAMP_PATH).render(record_from_uzi(result))
+
+
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(after) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(after)).encode()).decode()
+
+
+def decode_cursor(token: str) -> tuple:
+    data_isl, vc = json.loads(base64.urlsafe_b64decode(token.encode()))
+    return data_isl, int(vc)
+
+
+@app.route('/uzi/', methods=['GET'])
+def handle_search():
+    """
+    Поиск исследований с пагинацией.
+    Параметры: fio, fio_prefix, number_med_card, date_from, date_to, hospital_did, vc_type, limit, cursor.
+    Ответ: {"items": [...], "next_cursor": str | null} — записи без opisanie/zakl; next_cursor передаётся в cursor следующего запроса.
+    """
+    args = request.args
+    try:
+        limit = min(int(args.get('limit', 50)), MAX_PAGE_SIZE)
+        after = decode_cursor(args['cursor']) if args.get('cursor') else None
+        number_med_card = int(args['number_med_card']) if args.get('number_med_card') else None
+        vc_type = int(args['vc_type']) if args.get('vc_type') else None
+    except (ValueError, TypeError, binascii.Error):
+        return jsonify({"status": "bad request"}), 400
+    if limit <= 0:
+        return jsonify({"status": "bad request"}), 400
+
+    with HospitalDBManager(DB_PATH) as db_manager:
+        records, next_after = db_manager.search_uzi(
+            limit=limit,
+            after=after,
+            fio=args.get('fio'),
+            fio_prefix=args.get('fio_prefix'),
+            number_med_card=number_med_card,
+            date_from=args.get('date_from'),
+            date_to=args.get('date_to'),
+            hospital_did=args.get('hospital_did'),
+            vc_type=vc_type,
+        )
+
+    return jsonify({
+        "items": [record.to_dict(UZI_LIGHT_COLUMNS) for record in records],
+        "next_cursor": encode_cursor(next_after) if next_after else None,
+    }), 200
+
+
+@app.route('/uzi/search/', methods=['GET'])
+def handle_text_search():
+    """
+    Полнотекстовый поиск по описанию и заключению.
+    Параметры: q (обязательный), limit, offset, hospital_did.
+    Ответ: {"items": [{vc, data_isl, number_protocol, FIO, vid_issled, snippet, rank}, ...]}
+    """
+    text = request.args.get('q', '').strip()
+    try:
+        limit = min(int(request.args.get('limit', 20)), MAX_PAGE_SIZE)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"status": "bad request"}), 400
+    if not text or limit <= 0 or offset < 0:
+        return jsonify({"status": "bad request"}), 400
+
+    with HospitalDBManager(DB_PATH) as db_manager:
+        items = db_manager.search_uzi_text(text, limit=limit, offset=offset,
+                                           hospital_did=request.args.get('hospital_did'))
+
+    return jsonify({"items": items}), 200
+
 
 @app.route('/uzi/<id>/', methods=['GET'])
 def handle_retrival(id):
-    with HospitalDBManager() as db_manager:
+    with HospitalDBManager(DB_PATH) as db_manager:
         print("\nПоиск записей по vc:")
         results = db_manager.search_uzi_by_vc(id)
         for result in results:
-            print(f"  - {result[3]} (Протокол: {result[2]}, Дата: {result[1]})")
-        result=results[0]
-        generate_medical_pdf(
-            output_file="protocol.pdf",
-            date=result[1],
-            number_protocol=result[2],
-            FIO=result[3],
-            gender=result[4],
-            date_birth=result[5],
-            number_med_cart=result[6],
-            nupr_otdel=result[7],
-            vid_issled=result[8],
-            vc_type=result[9],
-            scaner=result[10],
-            datchik=result[11],
-            opisanie=result[12],
-            zakl=result[13],
-            fio_vrach=result[14],
-            stamp_path = "seal.png"
+            print(f"  - {result.FIO} (Протокол: {result.number_protocol}, Дата: {result.data_isl})")
+    if not results:
+        return jsonify({"status": "not found"}), 404
+
+    result = results[0]
+    # ключ кэша зависит только от строки и версии шаблона, поэтому 304 отдаётся без рендера
+    etag = record_key(result.values(), TEMPLATE_VERSION)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    pdf = pdf_cache.get(etag)
+    if pdf is None:
+        pdf = render_protocol(result)
+        pdf_cache.put(etag, pdf)
+
+    response = Response(pdf, mimetype="application/pdf")
+    response.headers["Content-Length"] = str(len(pdf))
+    response.headers["Content-Disposition"] = f'inline; filename="protocol_{result.number_protocol}.pdf"'
+    response.set_etag(etag)
+    return response
+
+
+@app.route('/uzi/export/', methods=['POST'])
+def handle_export():
+    """
+    Выгрузка протоколов по фильтру одним ZIP-архивом.
+    Тело: {"date_from": ..., "date_to": ..., "hospital_did": ..., "vc_type": ..., "workers": ...} — все поля необязательны.
+    """
+    message = request.get_json(silent=True) or {}
+    workers = None
+    if message.get("workers") is not None:
+        # число процессов рендеринга задаёт клиент — не больше числа CPU
+        try:
+            workers = int(message["workers"])
+        except (ValueError, TypeError):
+            return jsonify({"status": "bad request"}), 400
+        if workers <= 0:
+            return jsonify({"status": "bad request"}), 400
+        workers = min(workers, os.cpu_count() or 1)
+
+    workdir = tempfile.mkdtemp(prefix="uzi_export_")
+    output = os.path.join(workdir, "protocols.zip")
+    try:
+        exported = export_protocols(
+            output=output,
+            db_path=DB_PATH,
+            date_from=message.get("date_from"),
+            date_to=message.get("date_to"),
+            hospital_did=message.get("hospital_did"),
+            vc_type=message.get("vc_type"),
+            workers=workers,
+            resume=False,
         )
-        return send_file("protocol.pdf") 
-    return 500
+    except Exception as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        print(f"Ошибка выгрузки протоколов: {e}")
+        return jsonify({"status": "failed"}), 500
+
+    response = send_file(output, mimetype="application/zip", as_attachment=True, download_name="protocols.zip")
+    response.headers["X-Exported-Count"] = str(exported)
+    response.call_on_close(lambda: shutil.rmtree(workdir, ignore_errors=True))
+    return response
 
 
 if __name__ == '__main__':
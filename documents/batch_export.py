@@ -0,0 +1,173 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from doc import get_protocol_template, record_from_uzi, TEMPLATE_VERSION
+from DataBase.work_db import HospitalDBManager
+
+STAMP_PATH = "seal.png"
+
+
+def _init_worker(stamp_path):
+    # шаблон (стили, печать) строится один раз на процесс пула, а не на каждый PDF
+    get_protocol_template(stamp_path)
+
+
+def _render_row(args):
+    uzi, stamp_path = args
+    return uzi.vc, uzi.number_protocol, get_protocol_template(stamp_path).render(record_from_uzi(uzi))
+
+
+def protocol_filename(number_protocol) -> str:
+    return f"protocol_{number_protocol}.pdf"
+
+
+def _write_atomic(directory: str, name: str, pdf: bytes):
+    target = os.path.join(directory, name)
+    with open(target + ".tmp", "wb") as f:
+        f.write(pdf)
+    os.replace(target + ".tmp", target)
+
+
+def _pack_zip(directory: str, output: str):
+    tmp_output = output + ".tmp"
+    # PDF уже сжаты внутри, повторное сжатие почти ничего не даёт
+    with zipfile.ZipFile(tmp_output, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".pdf"):
+                archive.write(os.path.join(directory, name), arcname=name)
+    os.replace(tmp_output, output)
+    shutil.rmtree(directory)
+
+
+def _clear_previous_run(directory: str, as_zip: bool):
+    if as_zip:
+        # <output>.parts создаётся только этой выгрузкой
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    if not os.path.isdir(directory):
+        return
+    # каталог указал пользователь: удаляем только свои протоколы
+    for name in os.listdir(directory):
+        if name.startswith("protocol_") and name.endswith((".pdf", ".pdf.tmp")):
+            os.remove(os.path.join(directory, name))
+
+
+def _load_checkpoint(path: str, filters: dict) -> Optional[int]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("filters") != filters or checkpoint.get("template_version") != TEMPLATE_VERSION:
+        logging.warning("Checkpoint создан для другого фильтра или версии шаблона, выгрузка начнётся заново")
+        return None
+    return checkpoint.get("last_vc")
+
+
+def _save_checkpoint(path: str, filters: dict, last_vc: int, done: int):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"filters": filters, "template_version": TEMPLATE_VERSION, "last_vc": last_vc, "done": done}, f)
+    os.replace(tmp_path, path)
+
+
+def print_progress(done: int, total: int, started_at: float):
+    elapsed = time.monotonic() - started_at
+    rate = done / elapsed if elapsed else 0.0
+    print(f"\rВыгружено {done}/{total} ({rate:.1f} PDF/с)", end="", file=sys.stderr, flush=True)
+
+
+def export_protocols(output: str, db_path: str = "Hospital.db", date_from: Optional[str] = None,
+                     date_to: Optional[str] = None, hospital_did: Optional[str] = None,
+                     vc_type: Optional[int] = None, workers: Optional[int] = None, chunk_size: int = 200,
+                     resume: bool = True, stamp_path: Optional[str] = STAMP_PATH,
+                     progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Массовая выгрузка PDF-протоколов УЗИ.
+
+    Строки читаются из SQLite порциями по chunk_size и рендерятся параллельно в
+    ProcessPoolExecutor (workers процессов, по умолчанию — число CPU). output,
+    оканчивающийся на .zip, — ZIP-архив, иначе каталог. Для ZIP файлы сначала пишутся в
+    каталог <output>.parts (его переживает и аварийная остановка), архив собирается в конце.
+
+    После каждой записанной порции в <output>.checkpoint.json сохраняется последний vc;
+    при resume=True повторный запуск с тем же фильтром продолжает с этого места.
+    После успешного завершения checkpoint удаляется. progress(done, total) вызывается после каждой порции.
+    Возвращает количество выгруженных в этом запуске протоколов.
+    """
+    filters = {"date_from": date_from, "date_to": date_to, "hospital_did": hospital_did, "vc_type": vc_type}
+    checkpoint_path = output.rstrip("/\\") + ".checkpoint.json"
+    after_vc = _load_checkpoint(checkpoint_path, filters) if resume else None
+
+    as_zip = output.lower().endswith(".zip")
+    directory = output + ".parts" if as_zip else output
+    if after_vc is None:
+        # выгрузка с начала: PDF прошлого запуска (другой фильтр или шаблон) не должны попасть в результат
+        _clear_previous_run(directory, as_zip)
+    os.makedirs(directory, exist_ok=True)
+
+    done = 0
+    with HospitalDBManager(db_path) as db_manager:
+        total = db_manager.count_uzi(**filters)
+        if after_vc is not None:
+            done = db_manager.count_uzi(up_to_vc=after_vc, **filters)
+        exported = 0
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(stamp_path,)) as executor:
+            for rows in db_manager.iter_uzi_chunks(chunk_size=chunk_size, after_vc=after_vc, **filters):
+                # map сохраняет порядок строк, поэтому checkpoint по последнему vc порции корректен
+                tasks = [(row, stamp_path) for row in rows]
+                for _, number_protocol, pdf in executor.map(_render_row, tasks, chunksize=max(1, len(tasks) // 32)):
+                    _write_atomic(directory, protocol_filename(number_protocol), pdf)
+
+                done += len(rows)
+                exported += len(rows)
+                _save_checkpoint(checkpoint_path, filters, rows[-1].vc, done)
+                if progress:
+                    progress(done, total)
+
+    if as_zip:
+        _pack_zip(directory, output)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return exported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовая выгрузка PDF-протоколов УЗИ")
+    parser.add_argument("output", help="каталог или файл .zip для результата")
+    parser.add_argument("--db", default="Hospital.db", help="путь к базе SQLite")
+    parser.add_argument("--from", dest="date_from", help="data_isl от (включительно), напр. 2024-01-01")
+    parser.add_argument("--to", dest="date_to", help="data_isl до (включительно), напр. 2024-12-31 23:59:59")
+    parser.add_argument("--hospital-did", help="DID больницы")
+    parser.add_argument("--vc-type", type=int, help="тип VC")
+    parser.add_argument("--workers", type=int, help="число процессов рендеринга (по умолчанию — число CPU)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="строк за один запрос к базе")
+    parser.add_argument("--no-resume", action="store_true", help="игнорировать checkpoint и начать заново")
+    args = parser.parse_args()
+
+    started_at = time.monotonic()
+    exported = export_protocols(
+        output=args.output,
+        db_path=args.db,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        hospital_did=args.hospital_did,
+        vc_type=args.vc_type,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        resume=not args.no_resume,
+        progress=lambda done, total: print_progress(done, total, started_at),
+    )
+    print(f"\nГотово: {exported} протоколов за {time.monotonic() - started_at:.1f} с -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Бенчмарки конвейера PDF-протоколов (documents).
+
+Сценарии:
+  render_text_<N>     — один рендер через прогретый ProtocolTemplate при длине opisanie N символов;
+  cold_start          — новый процесс: импорт doc (регистрация шрифта), создание шаблона (печать), первый рендер;
+  warm_render         — повторный рендер в том же процессе (для сравнения с cold_start);
+  threads_<K> / processes_<K> — пропускная способность K потоков / процессов;
+  http_uzi_miss / http_uzi_hit / http_uzi_304 / http_uzi_list — маршруты backend через Flask test client
+                        на синтетической базе из --rows записей.
+
+Запуск из каталога documents:
+  python benchmarks/bench_pdf.py --rows 10000 --save benchmarks/results/baseline.json
+  python benchmarks/bench_pdf.py --compare benchmarks/results/baseline.json --threshold 0.2
+
+С --compare процесс завершается с кодом 1, если среднее время какого-либо сценария
+выросло больше чем на threshold (доля) относительно сохранённого результата.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+DOCUMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAMP_PATH = "seal.png"
+
+PARAGRAPH = ("Стенки артерий неравномерно утолщены (КИМ 1,1-1.3 мм), дифференциация на слои нарушена. "
+             "Линейная скорость кровотока по общим сонным артериям в пределах возрастной нормы. ")
+
+
+def _text(length: int) -> str:
+    return (PARAGRAPH * (length // len(PARAGRAPH) + 1))[:length]
+
+
+def synthetic_record(i: int, opisanie_length: int = 1500) -> dict:
+    return {
+        'vc': i,
+        'data_isl': (datetime(2024, 1, 1) + timedelta(minutes=17 * i)).strftime('%Y-%m-%d %H:%M:%S'),
+        'number_protocol': 1000000 + i,
+        'FIO': f'Пациент {i % 5000} Тестовый',
+        'gender': 'Ж' if i % 2 else 'М',
+        'date_birth': '1980-01-01 00:00:00',
+        'number_med_card': 100000 + i % 5000,
+        'napr_otd': 'Кардиологическое отделение',
+        'vid_issled': 'Триплексное сканирование артерий',
+        'vc_type': 1,
+        'scaner': 'PHILIPS EPIQ5G',
+        'datchik': 'Конвексный 3.5 МГц',
+        'opisanie': _text(opisanie_length),
+        'zakl': 'Ультразвуковые признаки стенозирующего атеросклероза брахиоцефальных артерий',
+        'fio_vrach': 'Иванов П.К.',
+        'hospital_did': None,
+    }
+
+
+def protocol_record(i: int, opisanie_length: int = 1500) -> dict:
+    row = synthetic_record(i, opisanie_length)
+    return {
+        'date': row['data_isl'], 'number_protocol': row['number_protocol'], 'FIO': row['FIO'],
+        'gender': row['gender'], 'date_birth': row['date_birth'], 'number_med_cart': row['number_med_card'],
+        'nupr_otdel': row['napr_otd'], 'vid_issled': row['vid_issled'], 'vc_type': row['vc_type'],
+        'scaner': row['scaner'], 'datchik': row['datchik'], 'opisanie': row['opisanie'],
+        'zakl': row['zakl'], 'fio_vrach': row['fio_vrach'],
+    }
+
+
+def summarize(samples: list, items_per_sample: int = 1) -> dict:
+    samples = sorted(samples)
+    total = sum(samples)
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "ops_per_sec": len(samples) * items_per_sample / total if total else 0.0,
+    }
+
+
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started_at)
+    return summarize(samples)
+
+
+# --- рендер ---
+def bench_render_sizes(results: dict, sizes, repeat: int):
+    from doc import get_protocol_template
+
+    template = get_protocol_template(STAMP_PATH)
+    for size in sizes:
+        record = protocol_record(1, size)
+        results[f"render_text_{size}"] = measure(lambda: template.render(record), repeat)
+
+
+def _cold_render(_=None) -> dict:
+    # выполняется в свежем процессе (spawn): ничего не закэшировано
+    os.chdir(DOCUMENTS_DIR)
+    sys.path.insert(0, DOCUMENTS_DIR)
+    timings = {}
+    started_at = time.perf_counter()
+    import doc
+    timings["import"] = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    template = doc.ProtocolTemplate(STAMP_PATH)
+    timings["template"] = time.perf_counter() - started_at
+
+    record = protocol_record(1)
+    started_at = time.perf_counter()
+    template.render(record)
+    timings["first_render"] = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    template.render(record)
+    timings["warm_render"] = time.perf_counter() - started_at
+    return timings
+
+
+def bench_cold_warm(results: dict, repeat: int):
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            runs.append(executor.submit(_cold_render).result())
+
+    results["cold_start"] = summarize([r["import"] + r["template"] + r["first_render"] for r in runs])
+    results["cold_start"]["breakdown_ms"] = {
+        key: statistics.mean(r[key] for r in runs) * 1000 for key in ("import", "template", "first_render")
+    }
+    results["warm_render"] = summarize([r["warm_render"] for r in runs])
+
+
+def _render_one(i: int) -> int:
+    from doc import get_protocol_template
+    return len(get_protocol_template(STAMP_PATH).render(protocol_record(i)))
+
+
+def bench_concurrency(results: dict, workers_list, renders: int):
+    _render_one(0)
+    for workers in workers_list:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            started_at = time.perf_counter()
+            list(executor.map(_render_one, range(renders)))
+            elapsed = time.perf_counter() - started_at
+        results[f"threads_{workers}"] = summarize([elapsed], items_per_sample=renders)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_render_one, range(workers)))  # прогрев шаблона в каждом процессе
+            started_at = time.perf_counter()
+            list(executor.map(_render_one, range(renders)))
+            elapsed = time.perf_counter() - started_at
+        results[f"processes_{workers}"] = summarize([elapsed], items_per_sample=renders)
+
+
+# --- HTTP ---
+def build_database(path: str, rows: int, batch_size: int = 5000):
+    from DataBase.work_db import HospitalDBManager
+
+    with HospitalDBManager(path) as db_manager:
+        if db_manager.count_uzi() >= rows:
+            return
+        db_manager.add_records((synthetic_record(i) for i in range(1, rows + 1)), batch_size=batch_size)
+
+
+def bench_http(results: dict, rows: int, repeat: int, db_dir: str):
+    db_path = os.path.join(db_dir, f"bench_{rows}.db")
+    started_at = time.perf_counter()
+    build_database(db_path, rows)
+    results["build_database"] = {"rows": rows, "seconds": time.perf_counter() - started_at}
+
+    # backend читает настройки при импорте: отдельная база и только in-memory кэш PDF
+    os.environ["HOSPITAL_DB"] = db_path
+    os.environ["PDF_CACHE_DIR"] = ""
+    import backend
+
+    client = backend.app.test_client()
+    ids = [1 + (i * 7919) % rows for i in range(repeat)]
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull  # маршруты печатают найденные записи
+    try:
+        def miss():
+            backend.pdf_cache._memory.clear()
+            assert client.get(f"/uzi/{ids[0]}/").status_code == 200
+
+        results["http_uzi_miss"] = measure(miss, repeat)
+
+        etag = client.get(f"/uzi/{ids[0]}/").headers["ETag"]
+        results["http_uzi_hit"] = measure(lambda: client.get(f"/uzi/{ids[0]}/"), repeat * 5)
+        results["http_uzi_304"] = measure(
+            lambda: client.get(f"/uzi/{ids[0]}/", headers={"If-None-Match": etag}), repeat * 5)
+        results["http_uzi_list"] = measure(
+            lambda: client.get("/uzi/?limit=50&number_med_card=100042"), repeat * 5)
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+
+# --- сохранение и сравнение ---
+def compare(results: dict, baseline_path: str, threshold: float) -> list:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or "mean_ms" not in base or "mean_ms" not in current:
+            continue
+        change = (current["mean_ms"] - base["mean_ms"]) / base["mean_ms"] if base["mean_ms"] else 0.0
+        marker = "РЕГРЕССИЯ" if change > threshold else ""
+        print(f"{name:24} {base['mean_ms']:10.2f} -> {current['mean_ms']:10.2f} ms ({change:+.1%}) {marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки генерации PDF-протоколов")
+    parser.add_argument("--rows", type=int, default=10000, help="записей в синтетической базе (10k–1M)")
+    parser.add_argument("--repeat", type=int, default=10, help="повторов на сценарий")
+    parser.add_argument("--sizes", default="500,5000,20000,50000", help="длины opisanie через запятую")
+    parser.add_argument("--workers", default="1,2,4", help="число потоков/процессов через запятую")
+    parser.add_argument("--renders", type=int, default=32, help="рендеров в сценариях параллельности")
+    parser.add_argument("--only", default="render,cold,concurrency,http", help="какие группы запускать")
+    parser.add_argument("--db-dir", default=tempfile.gettempdir(), help="где хранить синтетические базы (переиспользуются)")
+    parser.add_argument("--save", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON с сохранёнными результатами для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост среднего времени (доля)")
+    args = parser.parse_args()
+
+    os.chdir(DOCUMENTS_DIR)
+    sys.path.insert(0, DOCUMENTS_DIR)
+    groups = set(args.only.split(","))
+
+    results = {}
+    if "render" in groups:
+        bench_render_sizes(results, [int(s) for s in args.sizes.split(",")], args.repeat)
+    if "cold" in groups:
+        bench_cold_warm(results, max(1, args.repeat // 3))
+    if "concurrency" in groups:
+        bench_concurrency(results, [int(w) for w in args.workers.split(",")], args.renders)
+    if "http" in groups:
+        bench_http(results, args.rows, args.repeat, args.db_dir)
+
+    for name, value in results.items():
+        if "mean_ms" in value:
+            print(f"{name:24} mean {value['mean_ms']:9.2f} ms  p95 {value['p95_ms']:9.2f} ms  {value['ops_per_sec']:9.1f} ops/s")
+        else:
+            print(f"{name:24} {value}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"Регрессии производительности: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
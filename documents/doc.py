@@ -1,6 +1,6 @@
 import sqlite3
 
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
@@ -8,9 +8,13 @@ from reportlab.lib import colors
 from datetime import datetime
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.utils import ImageReader
+from PIL import Image as PILImage
 
 from DataBase.work_db import HospitalDBManager
+import io
 import os
+import threading
 
 # Регистрация шрифта (проверяем наличие файла)
 font_path = 'fonts/DejaVuSans.ttf'
@@ -28,6 +32,224 @@ else:
     print("Используется стандартный шрифт (возможны проблемы с кириллицей)")
     FONT_NAME = 'Helvetica'
 
+# Версия шаблона протокола: увеличить при любом изменении вёрстки, чтобы кэш PDF (pdf_cache) пересобрался
+TEMPLATE_VERSION = "2"
+
+
+class _StampImage(Flowable):
+    """Печать, нарисованная из заранее декодированного ImageReader (без повторного чтения PNG)."""
+
+    def __init__(self, reader: ImageReader, width: float, height: float):
+        super().__init__()
+        self.reader = reader
+        self.width = width
+        self.height = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask="auto")
+
+
+class ProtocolTemplate:
+    """Переиспользуемый шаблон протокола исследования.
+
+    Стили абзацев и таблиц строятся один раз, печать декодируется и уменьшается до
+    stamp_dpi один раз; render(record) только раскладывает данные конкретной записи.
+    record — словарь с ключами аргументов generate_medical_pdf (date, number_protocol, FIO, ...).
+    Экземпляр можно использовать из нескольких потоков: render не меняет его состояние.
+    """
+
+    STAMP_WIDTH = 120
+    STAMP_HEIGHT = 130
+
+    def __init__(self, stamp_path=None, stamp_dpi: int = 300):
+        styles = getSampleStyleSheet()
+
+        # Создаем стили с указанием шрифта
+        self.title_style = ParagraphStyle(
+            'TitleStyle',
+            parent=styles['Title'],
+            alignment=TA_CENTER,
+            fontName=FONT_NAME,  # Указываем шрифт
+            fontSize=14,
+            spaceAfter=20
+        )
+
+        self.heading_style = ParagraphStyle(
+            'HeadingStyle',
+            parent=styles['Heading3'],
+            fontName=FONT_NAME,  # Указываем шрифт
+            fontSize=12,
+            spaceAfter=6
+        )
+
+        self.normal_style = ParagraphStyle(
+            'NormalStyle',
+            parent=styles['Normal'],
+            fontName=FONT_NAME,  # Указываем шрифт
+            fontSize=10,
+            leading=14
+        )
+
+        # Стиль для текста в таблицах
+        self.table_text_style = ParagraphStyle(
+            'TableTextStyle',
+            parent=styles['Normal'],
+            fontName=FONT_NAME,  # Указываем шрифт
+            fontSize=10
+        )
+
+        self.patient_table_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.grey),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),  # Указываем шрифт для таблицы
+        ])
+
+        self.sign_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),  # Указываем шрифт для таблицы
+        ])
+
+        self.stamp_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),  # Печать справа
+        ])
+
+        self.stamp = self._load_stamp(stamp_path, stamp_dpi) if stamp_path else None
+
+    def _load_stamp(self, stamp_path, stamp_dpi: int):
+        if not os.path.exists(stamp_path):
+            return None
+
+        # уменьшаем печать до размера вывода: меньше работы на сжатие и меньше итоговый PDF
+        size = (round(self.STAMP_WIDTH * stamp_dpi / 72), round(self.STAMP_HEIGHT * stamp_dpi / 72))
+        with PILImage.open(stamp_path) as im:
+            im.load()
+            if im.width > size[0] or im.height > size[1]:
+                im = im.resize(size, PILImage.LANCZOS)
+            reader = ImageReader(im.copy())
+
+        # декодируем сразу, чтобы drawImage в каждом документе брал готовые данные
+        reader.getRGBData()
+        return reader
+
+    def render(self, record) -> bytes:
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=40,
+            leftMargin=40,
+            topMargin=40,
+            bottomMargin=40,
+            invariant=1
+        )
+
+        text_style = self.table_text_style
+        story = []
+
+        # Заголовок
+        story.append(Paragraph("ПРОТОКОЛ ИССЛЕДОВАНИЯ", self.title_style))
+        story.append(Spacer(1, 20))
+
+        story.append(Spacer(1, 15))
+
+        # Основные данные пациента
+        patient_data = [
+            [Paragraph("Дата и время исследования:", text_style), Paragraph(record['date'], text_style)],
+            [Paragraph("Номер протокола:", text_style), Paragraph(str(record['number_protocol']), text_style)],
+            [Paragraph("ФИО больного:", text_style), Paragraph(record['FIO'], text_style)],
+            [Paragraph("Пол:", text_style), Paragraph(record['gender'], text_style)],
+            [Paragraph("Дата рождения:", text_style), Paragraph(record['date_birth'], text_style)],
+            [Paragraph("Номер мед. карты:", text_style), Paragraph(str(record['number_med_cart']), text_style)],
+            [Paragraph("Направившее отделение:", text_style), Paragraph(record['nupr_otdel'], text_style)],
+            [Paragraph("Вид исследования:", text_style), Paragraph(record['vid_issled'], text_style)],
+        ]
+
+        table = Table(patient_data, colWidths=[200, 300])
+        table.setStyle(self.patient_table_style)
+        story.append(table)
+        story.append(Spacer(1, 20))
+        # УЗ-сканер и характеристики датчиков (вне таблицы)
+        scanner_text = f"<b>УЗ-сканер:</b> {record['scaner']}, <b>Частотные характеристики датчиков:</b> {record['datchik']}"
+        story.append(Paragraph(scanner_text, text_style))
+        story.append(Spacer(1, 15))
+
+        # Описание процедуры
+        opisanie_text = f"<b>Описание процедуры:</b> {record['opisanie']}"
+        story.append(Paragraph(opisanie_text, self.normal_style))
+        story.append(Spacer(1, 15))
+
+        # Заключение
+        zakl_text = f"<b>Заключение:</b> {record['zakl']}"
+        story.append(Paragraph(zakl_text, self.normal_style))
+        story.append(Spacer(1, 50))
+
+        # Подпись врача
+        sign_table = Table(
+            [
+                [
+                    Paragraph("Врач:", text_style),
+                    Paragraph(record['fio_vrach'], text_style),
+                    Paragraph("Подпись:", text_style),
+                    Paragraph("______________", text_style)
+                ]
+            ],
+            colWidths=[60, 200, 80, 120]
+        )
+        sign_table.setStyle(self.sign_table_style)
+
+        story.append(sign_table)
+        # Печать на отдельной строке справа
+        if self.stamp is not None:
+            story.append(Spacer(1, 10))  # Небольшой отступ
+
+            # Таблица для выравнивания печати по правому краю
+            stamp_table = Table([[_StampImage(self.stamp, self.STAMP_WIDTH, self.STAMP_HEIGHT)]], colWidths=[515])
+            stamp_table.setStyle(self.stamp_table_style)
+            story.append(stamp_table)
+
+        doc.build(story)
+        return buffer.getvalue()
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_protocol_template(stamp_path=None) -> ProtocolTemplate:
+    """Общий ProtocolTemplate на процесс для данного stamp_path (создаётся при первом вызове)."""
+    template = _templates.get(stamp_path)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(stamp_path)
+            if template is None:
+                template = _templates[stamp_path] = ProtocolTemplate(stamp_path)
+    return template
+
+
+def record_from_uzi(uzi) -> dict:
+    """UziRecord (DataBase.work_db) -> record для ProtocolTemplate.render."""
+    return {
+        'date': uzi.data_isl,
+        'number_protocol': uzi.number_protocol,
+        'FIO': uzi.FIO,
+        'gender': uzi.gender,
+        'date_birth': uzi.date_birth,
+        'number_med_cart': uzi.number_med_card,
+        'nupr_otdel': uzi.napr_otd,
+        'vid_issled': uzi.vid_issled,
+        'vc_type': uzi.vc_type,
+        'scaner': uzi.scaner,
+        'datchik': uzi.datchik,
+        'opisanie': uzi.opisanie,
+        'zakl': uzi.zakl,
+        'fio_vrach': uzi.fio_vrach,
+    }
+
 
 def generate_medical_pdf(
         output_file,
@@ -46,128 +268,40 @@ def generate_medical_pdf(
         zakl: str,
         fio_vrach: str,
         stamp_path=None
-):
-    doc = SimpleDocTemplate(
-        output_file,
-        pagesize=A4,
-        rightMargin=40,
-        leftMargin=40,
-        topMargin=40,
-        bottomMargin=40
-    )
-
-    styles = getSampleStyleSheet()
-
-    # Создаем стили с указанием шрифта
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        parent=styles['Title'],
-        alignment=TA_CENTER,
-        fontName=FONT_NAME,  # Указываем шрифт
-        fontSize=14,
-        spaceAfter=20
-    )
-
-    heading_style = ParagraphStyle(
-        'HeadingStyle',
-        parent=styles['Heading3'],
-        fontName=FONT_NAME,  # Указываем шрифт
-        fontSize=12,
-        spaceAfter=6
-    )
-
-    normal_style = ParagraphStyle(
-        'NormalStyle',
-        parent=styles['Normal'],
-        fontName=FONT_NAME,  # Указываем шрифт
-        fontSize=10,
-        leading=14
-    )
-
-    # Стиль для текста в таблицах
-    table_text_style = ParagraphStyle(
-        'TableTextStyle',
-        parent=styles['Normal'],
-        fontName=FONT_NAME,  # Указываем шрифт
-        fontSize=10
-    )
-
-    story = []
-
-    # Заголовок
-    story.append(Paragraph("ПРОТОКОЛ ИССЛЕДОВАНИЯ", title_style))
-    story.append(Spacer(1, 20))
-
-    story.append(Spacer(1, 15))
-
-    # Основные данные пациента
-    patient_data = [
-        [Paragraph("Дата и время исследования:", table_text_style), Paragraph(date, table_text_style)],
-        [Paragraph("Номер протокола:", table_text_style), Paragraph(str(number_protocol), table_text_style)],
-        [Paragraph("ФИО больного:", table_text_style), Paragraph(FIO, table_text_style)],
-        [Paragraph("Пол:", table_text_style), Paragraph(gender, table_text_style)],
-        [Paragraph("Дата рождения:", table_text_style), Paragraph(date_birth, table_text_style)],
-        [Paragraph("Номер мед. карты:", table_text_style), Paragraph(str(number_med_cart), table_text_style)],
-        [Paragraph("Направившее отделение:", table_text_style), Paragraph(nupr_otdel, table_text_style)],
-        [Paragraph("Вид исследования:", table_text_style), Paragraph(vid_issled, table_text_style)],
-    ]
-
-    table = Table(patient_data, colWidths=[200, 300])
-    table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.grey),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),  # Указываем шрифт для таблицы
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 20))
-    # УЗ-сканер и характеристики датчиков (вне таблицы)
-    scanner_text = f"<b>УЗ-сканер:</b> {scaner}, <b>Частотные характеристики датчиков:</b> {datchik}"
-    story.append(Paragraph(scanner_text, table_text_style))
-    story.append(Spacer(1, 15))
-
-    # Описание процедуры
-    opisanie_text = f"<b>Описание процедуры:</b> {opisanie}"
-    story.append(Paragraph(opisanie_text, normal_style))
-    story.append(Spacer(1, 15))
-
-    # Заключение
-    zakl_text = f"<b>Заключение:</b> {zakl}"
-    story.append(Paragraph(zakl_text, normal_style))
-    story.append(Spacer(1, 50))
-
-    # Подпись врача
-    sign_table = Table(
-        [
-            [
-                Paragraph("Врач:", table_text_style),
-                Paragraph(fio_vrach, table_text_style),
-                Paragraph("Подпись:", table_text_style),
-                Paragraph("______________", table_text_style)
-            ]
-        ],
-        colWidths=[60, 200, 80, 120]
-    )
-    sign_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('FONTNAME', (0, 0), (-1, -1), FONT_NAME),  # Указываем шрифт для таблицы
-    ]))
-
-    story.append(sign_table)
-    # Печать на отдельной строке справа
-    if stamp_path and os.path.exists(stamp_path):
-        story.append(Spacer(1, 10))  # Небольшой отступ
-
-        # Таблица для выравнивания печати по правому краю
-        stamp_table = Table([[Image(stamp_path, width=120, height=130)]], colWidths=[515])
-        stamp_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),  # Печать справа
-        ]))
-        story.append(stamp_table)
+) -> bytes:
+    """Рендерит протокол в память и возвращает содержимое PDF.
+
+    output_file — путь к файлу или записываемый буфер (BytesIO и т.п.), куда дополнительно
+    пишется результат; None — только вернуть bytes. invariant=1 делает вывод детерминированным
+    (без даты создания и случайного ID), поэтому одинаковые данные дают одинаковые байты.
+    Вёрстку выполняет общий ProtocolTemplate, см. get_protocol_template.
+    """
+    record = {
+        'date': date,
+        'number_protocol': number_protocol,
+        'FIO': FIO,
+        'gender': gender,
+        'date_birth': date_birth,
+        'number_med_cart': number_med_cart,
+        'nupr_otdel': nupr_otdel,
+        'vid_issled': vid_issled,
+        'vc_type': vc_type,
+        'scaner': scaner,
+        'datchik': datchik,
+        'opisanie': opisanie,
+        'zakl': zakl,
+        'fio_vrach': fio_vrach,
+    }
+    pdf = get_protocol_template(stamp_path).render(record)
+
+    if isinstance(output_file, (str, os.PathLike)):
+        with open(output_file, "wb") as f:
+            f.write(pdf)
+        print(f"PDF '{output_file}' успешно создан")
+    elif output_file is not None:
+        output_file.write(pdf)
 
-    doc.build(story)
-    print(f"PDF '{output_file}' успешно создан")
+    return pdf
 
 def populate_test_data():
     with HospitalDBManager() as db_manager:
@@ -264,24 +398,11 @@ def main():
         print("\nПоиск записей по vc:")
         results = db_manager.search_uzi_by_vc(4)
         for result in results:
-            print(f"  - {result[3]} (Протокол: {result[2]}, Дата: {result[1]})")
+            print(f"  - {result.FIO} (Протокол: {result.number_protocol}, Дата: {result.data_isl})")
         result=results[0]
         generate_medical_pdf(
             output_file="protocol.pdf",
-            date=result[1],
-            number_protocol=result[2],
-            FIO=result[3],
-            gender=result[4],
-            date_birth=result[5],
-            number_med_cart=result[6],
-            nupr_otdel=result[7],
-            vid_issled=result[8],
-            vc_type=result[9],
-            scaner=result[10],
-            datchik=result[11],
-            opisanie=result[12],
-            zakl=result[13],
-            fio_vrach=result[14],
+            **record_from_uzi(result),
             stamp_path = "seal.png"
         )
 
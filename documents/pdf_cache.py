@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+
+def record_key(row: Sequence, template_version: str) -> str:
+    """Ключ кэша: sha256 от версии шаблона и всей строки UZI (включая updated_at).
+
+    Любое изменение записи или шаблона даёт новый ключ, поэтому устаревшие PDF
+    не инвалидируются явно, а просто перестают запрашиваться и вытесняются.
+    Ключ же используется как ETag — его можно сравнить с If-None-Match без рендера.
+    """
+    payload = json.dumps([template_version, list(row)], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    """Двухуровневый кэш отрендеренных PDF: LRU в памяти + каталог на диске с лимитом размера.
+
+    memory_items — сколько PDF держать в памяти; disk_dir=None отключает дисковый уровень;
+    disk_max_bytes — суммарный лимит файлов на диске, при превышении удаляются
+    давно не использованные (по mtime, который обновляется при чтении).
+    """
+
+    def __init__(self, memory_items: int = 128, disk_dir: Optional[str] = "pdf_cache",
+                 disk_max_bytes: int = 256 * 1024 * 1024):
+        self.memory_items = memory_items
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._disk_sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pdf")
+
+    def _load_disk_index(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".pdf"):
+                continue
+            stat = os.stat(os.path.join(self.disk_dir, name))
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk_sizes[key] = size
+            self._disk_bytes += size
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            pdf = self._memory.get(key)
+            if pdf is not None:
+                self._memory.move_to_end(key)
+                return pdf
+            on_disk = self.disk_dir and key in self._disk_sizes
+
+        if not on_disk:
+            return None
+
+        try:
+            with open(self._path(key), "rb") as f:
+                pdf = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self._disk_bytes -= self._disk_sizes.pop(key, 0)
+            return None
+
+        with self._lock:
+            if key in self._disk_sizes:
+                self._disk_sizes.move_to_end(key)
+            self._remember(key, pdf)
+        return pdf
+
+    def put(self, key: str, pdf: bytes):
+        with self._lock:
+            self._remember(key, pdf)
+            if not self.disk_dir or key in self._disk_sizes:
+                return
+
+        # атомарная запись: читатель никогда не увидит недописанный файл
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Ошибка записи PDF в кэш: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            if key not in self._disk_sizes:
+                self._disk_sizes[key] = len(pdf)
+                self._disk_bytes += len(pdf)
+            evicted = self._evict_disk()
+
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def _remember(self, key: str, pdf: bytes):
+        self._memory[key] = pdf
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> list:
+        evicted = []
+        while self._disk_bytes > self.disk_max_bytes and len(self._disk_sizes) > 1:
+            old_key, size = self._disk_sizes.popitem(last=False)
+            self._disk_bytes -= size
+            evicted.append(old_key)
+        return evicted
@@ -0,0 +1,83 @@
+"""
+Планы запросов search_uzi (EXPLAIN QUERY PLAN): keyset-выборки идут по индексам, без полного
+прохода по UZI и без отдельной сортировки.
+
+Запуск из корня репозитория: python -m pytest documents/tests
+"""
+import os
+import sys
+
+import pytest
+
+DOCUMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DOCUMENTS_DIR)
+
+from DataBase.work_db import HospitalDBManager  # noqa: E402
+
+ROWS = 200
+
+# Фильтры, для которых страница читается из индекса в порядке (data_isl, vc) — сортировки быть не должно
+ORDERED_CASES = [
+    {},
+    {"after": ("2024-01-15 14:30:00", 100)},
+    {"fio": "Пациент 7"},
+    {"fio": "Пациент 7", "after": ("2024-01-15 14:30:00", 100)},
+    {"number_med_card": 100007},
+    {"date_from": "2024-01-01", "date_to": "2024-01-31 23:59:59"},
+    {"hospital_did": "M2yeapcDR9P7pi7mETjBui"},
+    {"hospital_did": "M2yeapcDR9P7pi7mETjBui", "date_from": "2024-01-01"},
+    {"vc_type": 1},
+    {"vc_type": 1, "after": ("2024-01-15 14:30:00", 100)},
+]
+
+
+def _record(i: int) -> dict:
+    return {
+        'vc': i,
+        'data_isl': f'2024-01-{1 + i % 28:02d} {i % 24:02d}:00:00',
+        'number_protocol': 1000000 + i,
+        'FIO': f'Пациент {i % 20}',
+        'gender': 'Ж' if i % 2 else 'М',
+        'date_birth': '1980-01-01 00:00:00',
+        'number_med_card': 100000 + i % 20,
+        'napr_otd': 'Кардиологическое отделение',
+        'vid_issled': 'Триплексное сканирование артерий',
+        'vc_type': None,
+        'scaner': 'PHILIPS EPIQ5G',
+        'datchik': 'Конвексный 3.5 МГц',
+        'opisanie': 'Описание',
+        'zakl': 'Заключение',
+        'fio_vrach': 'Иванов П.К.',
+        'hospital_did': None,
+    }
+
+
+@pytest.fixture(scope="module")
+def db_manager(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp("plans") / "plans.db")
+    with HospitalDBManager(db_path) as db_manager:
+        db_manager.add_records(_record(i) for i in range(1, ROWS + 1))
+        yield db_manager
+
+
+def _full_scans(plan: list) -> list:
+    # "SCAN UZI USING INDEX idx_uzi_data_isl" без фильтров — чтение по порядку до LIMIT, а не полный проход
+    return [detail for detail in plan if detail.startswith("SCAN UZI") and "USING" not in detail]
+
+
+@pytest.mark.parametrize("filters", ORDERED_CASES, ids=lambda filters: ",".join(filters) or "unfiltered")
+def test_search_uzi_uses_ordered_index(db_manager, filters):
+    plan = db_manager.explain_search_uzi(**filters)
+
+    assert not _full_scans(plan), plan
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
+    if filters:
+        assert any(detail.startswith("SEARCH UZI USING") for detail in plan), plan
+
+
+def test_search_uzi_fio_prefix_uses_index(db_manager):
+    # диапазон по FIO упорядочен по FIO, а не по дате: сортировка совпадений ожидаема (см. search_uzi)
+    plan = db_manager.explain_search_uzi(fio_prefix="Пациент 1")
+
+    assert not _full_scans(plan), plan
+    assert any(detail.startswith("SEARCH UZI USING") for detail in plan), plan
@@ -1,24 +1,83 @@
 import logging
+import time
 from typing import Any, Dict, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from hospital_controller.internal.domain.config import AdminProvider as ConfigAdminProvider
-
-
-def send_request(method: str, url: str, headers: Dict[str, str], json_body: Optional[dict] = None) -> Tuple[Any, bool]:
+from hospital_controller.internal.domain.config import AdminProviderClient as ConfigAdminProviderClient
+from hospital_controller.pkg import metrics
+
+ADMIN_API_LATENCY = metrics.REGISTRY.histogram(
+    "admin_api_request_duration_seconds", "ACA-Py Admin API request latency", ["endpoint"])
+ADMIN_API_REQUESTS = metrics.REGISTRY.counter(
+    "admin_api_requests_total", "ACA-Py Admin API requests by HTTP status (error — no response)", ["endpoint", "status"])
+ADMIN_API_ERRORS = metrics.REGISTRY.counter(
+    "admin_api_errors_total", "ACA-Py Admin API requests that failed (non-2xx or exception)", ["endpoint"])
+ADMIN_API_BYTES_OUT = metrics.REGISTRY.counter(
+    "admin_api_request_bytes_total", "Bytes sent in ACA-Py Admin API request bodies", ["endpoint"])
+ADMIN_API_BYTES_IN = metrics.REGISTRY.counter(
+    "admin_api_response_bytes_total", "Bytes received in ACA-Py Admin API response bodies", ["endpoint"])
+
+
+def observe_admin_call(endpoint: str, status: Any, seconds: float, bytes_out: int, bytes_in: int, ok: bool):
+    ADMIN_API_LATENCY.observe(seconds, endpoint)
+    ADMIN_API_REQUESTS.inc(endpoint, status)
+    ADMIN_API_BYTES_OUT.inc(endpoint, amount=bytes_out)
+    ADMIN_API_BYTES_IN.inc(endpoint, amount=bytes_in)
+    if not ok:
+        ADMIN_API_ERRORS.inc(endpoint)
+
+
+def new_session(cfg: ConfigAdminProviderClient) -> requests.Session:
+    """Создаёт requests.Session с keep-alive пулом соединений.
+
+    Повторы с экспоненциальным backoff включены только для идемпотентных GET:
+    POST-запросы к Admin API (send-presentation, issue, schemas) повторять небезопасно.
+    """
+    retry = Retry(
+        total=cfg.Retries,
+        backoff_factor=cfg.RetryBackoff,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cfg.PoolSize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def send_request(method: str, url: str, headers: Dict[str, str], json_body: Optional[dict] = None,
+                 session: Optional[requests.Session] = None,
+                 timeout: Optional[Tuple[float, float]] = None, name: Optional[str] = None) -> Tuple[Any, bool]:
     """Небольшой враппер над requests.request.
 
+    Если передана session — запрос идёт через её пул соединений (keep-alive).
+    timeout — (connect, read) в секундах.
+    name — имя эндпоинта из конфига (например, ProofGetCredentials) для метрик.
+
     Возвращает (content, ok). content — json (если возможно) или текст ошибки.
     """
+    started_at = time.perf_counter()
     try:
-        response = requests.request(
+        response = (session or requests).request(
             method=method,
             url=url,
             headers=headers,
             json=json_body if method.upper() not in ("GET", "DELETE") else None,
+            timeout=timeout,
         )
 
+        if name:
+            observe_admin_call(name, response.status_code, time.perf_counter() - started_at,
+                               len(response.request.body or b""), len(response.content),
+                               200 <= response.status_code < 300)
+
         if 200 <= response.status_code < 300:
             logging.info(f"Send request to {url} completed")
             try:
@@ -34,6 +93,8 @@ def send_request(method: str, url: str, headers: Dict[str, str], json_body: Opti
 
     except Exception as e:
         logging.error(f"Send request exception: {url} {e}")
+        if name:
+            observe_admin_call(name, "error", time.perf_counter() - started_at, 0, 0, False)
         return None, False
 
 
@@ -44,11 +105,21 @@ class AdminProvider:
         self.url = f"{cfg.Host}:{cfg.Port}"
         self.headers = {"X-API-Key": cfg.APIKey, "Content-Type": "application/json"}
         self.cfg = cfg
+        self.session = new_session(cfg.Client)
+        self.timeout = (cfg.Client.ConnectTimeout, cfg.Client.ReadTimeout)
+
+    def close(self):
+        self.session.close()
+
+    def _send(self, name: str, path: str, json_body: Optional[dict] = None) -> Tuple[Any, bool]:
+        method = getattr(self.cfg.Endpoints, name).Method
+        return send_request(method, self.url + path, self.headers, json_body,
+                            session=self.session, timeout=self.timeout, name=name)
 
     # --- Connections ---
     def accept_connection(self, connection_id: str) -> bool:
         path = self.cfg.Endpoints.AcceptConnection.Path.replace("{connection_id}", connection_id)
-        _, ok = send_request(self.cfg.Endpoints.AcceptConnection.Method, self.url + path, self.headers, {})
+        _, ok = self._send("AcceptConnection", path, {})
         return ok
 
     def create_invitation(self, alias: str, use_did_method: str = "did:peer:4") -> Tuple[Any, bool]:
@@ -58,8 +129,7 @@ class AdminProvider:
             "alias": alias,
             "auto_accept": True,
         }
-        _, ok = send_request(self.cfg.Endpoints.CreateInvitation.Method, self.url + self.cfg.Endpoints.CreateInvitation.Path,
-                             self.headers, body)
+        _, ok = self._send("CreateInvitation", self.cfg.Endpoints.CreateInvitation.Path, body)
         return _, ok
 
     # --- Wallet DID ---
@@ -69,58 +139,57 @@ class AdminProvider:
             "options": {"key_type": "ed25519"},
             "seed": seed,
         }
-        return send_request(self.cfg.Endpoints.WalletCreateDID.Method, self.url + self.cfg.Endpoints.WalletCreateDID.Path,
-                           self.headers, body)
+        return self._send("WalletCreateDID", self.cfg.Endpoints.WalletCreateDID.Path, body)
 
     def set_public_did(self, did: str) -> bool:
         path = self.cfg.Endpoints.WalletSetPublicDID.Path.replace("{did}", did)
-        _, ok = send_request(self.cfg.Endpoints.WalletSetPublicDID.Method, self.url + path, self.headers, {})
+        _, ok = self._send("WalletSetPublicDID", path, {})
         return ok
 
     # --- DIDComm basicmessages ---
     def send_message(self, connection_id: str, request: dict) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.SendMessage.Path.replace("{connection_id}", connection_id)
-        return send_request(self.cfg.Endpoints.SendMessage.Method, self.url + path, self.headers, request)
+        return self._send("SendMessage", path, request)
 
     # --- present-proof-2.0 (prover side) ---
     def proof_get_credentials(self, pres_ex_id: str) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.ProofGetCredentials.Path.replace("{pres_ex_id}", pres_ex_id)
-        return send_request(self.cfg.Endpoints.ProofGetCredentials.Method, self.url + path, self.headers)
+        return self._send("ProofGetCredentials", path)
 
     def proof_send_presentation(self, pres_ex_id: str, presentation: dict) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.ProofSendPresentation.Path.replace("{pres_ex_id}", pres_ex_id)
-        return send_request(self.cfg.Endpoints.ProofSendPresentation.Method, self.url + path, self.headers, presentation)
+        return self._send("ProofSendPresentation", path, presentation)
 
     # --- issue-credential-2.0 (holder side) ---
     def credential_send_request(self, cred_ex_id: str) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.CredentialSendRequest.Path.replace("{cred_ex_id}", cred_ex_id)
-        return send_request(self.cfg.Endpoints.CredentialSendRequest.Method, self.url + path, self.headers, {})
+        return self._send("CredentialSendRequest", path, {})
 
     def credential_get_record(self, cred_ex_id: str) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.CredentialGetRecord.Path.replace("{cred_ex_id}", cred_ex_id)
-        return send_request(self.cfg.Endpoints.CredentialGetRecord.Method, self.url + path, self.headers)
+        return self._send("CredentialGetRecord", path)
 
     # --- Indy ledger operations (use only after regulator permission) ---
     def schema_created(self, schema_name: str) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.SchemaCreated.Path.replace("{schema_name}", schema_name)
-        return send_request(self.cfg.Endpoints.SchemaCreated.Method, self.url + path, self.headers)
+        return self._send("SchemaCreated", path)
 
     def schema_create(self, schema_body: dict) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.SchemaCreate.Path
-        return send_request(self.cfg.Endpoints.SchemaCreate.Method, self.url + path, self.headers, schema_body)
+        return self._send("SchemaCreate", path, schema_body)
 
     def cred_def_created(self, schema_id: str) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.CredDefCreated.Path.replace("{schema_id}", schema_id)
-        return send_request(self.cfg.Endpoints.CredDefCreated.Method, self.url + path, self.headers)
+        return self._send("CredDefCreated", path)
 
     def cred_def_create(self, cred_def_body: dict) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.CredDefCreate.Path
-        return send_request(self.cfg.Endpoints.CredDefCreate.Method, self.url + path, self.headers, cred_def_body)
+        return self._send("CredDefCreate", path, cred_def_body)
 
     def credential_issue(self, cred_ex_id: str) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.CredentialIssue.Path.replace("{cred_ex_id}", cred_ex_id)
-        return send_request(self.cfg.Endpoints.CredentialIssue.Method, self.url + path, self.headers,{"comment":"epic"})
+        return self._send("CredentialIssue", path, {"comment":"epic"})
 
     def proof_verify_presentation(self, pres_ex_id: str) -> Tuple[Any, bool]:
         path = self.cfg.Endpoints.ProofVerifyPresentation.Path.replace("{pres_ex_id}", pres_ex_id)
-        return send_request(self.cfg.Endpoints.ProofVerifyPresentation.Method, self.url + path, self.headers, {})
+        return self._send("ProofVerifyPresentation", path, {})
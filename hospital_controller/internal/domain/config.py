@@ -1,8 +1,23 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
+class HttpAdapterWebhookQueue(BaseModel):
+    Enabled: bool = False
+    Workers: int = 4
+    MaxSize: int = 1000
+
+
 class HttpAdapter(BaseModel):
     Port: int
+    Host: str = "0.0.0.0"
+    # dev — встроенный сервер Flask; gthread — gunicorn (WSGI, потоки); asgi — gunicorn + uvicorn workers
+    Server: str = "dev"
+    Debug: bool = True
+    Workers: int = 1
+    Threads: int = 8
+    WebhookQueue: HttpAdapterWebhookQueue = HttpAdapterWebhookQueue()
 
 
 class Primary(BaseModel):
@@ -35,12 +50,28 @@ class AdminProviderEndpoints(BaseModel):
     CredDefCreate: Endpoint
 
 
+class AdminProviderClient(BaseModel):
+    PoolSize: int = 10
+    ConnectTimeout: float = 3.05
+    ReadTimeout: float = 30.0
+    Retries: int = 3
+    RetryBackoff: float = 0.3
+
+
 class AdminProvider(BaseModel):
     Host: str
     Port: int
     APIKey: str
     DIDSeed: str
     Endpoints: AdminProviderEndpoints
+    Client: AdminProviderClient = AdminProviderClient()
+
+
+class RegulatorRepoPermissionCache(BaseModel):
+    Enabled: bool = True
+    MaxSize: int = 1024
+    TTLSeconds: Optional[float] = 300
+    NotifyChannel: str = "hospital_permissions"
 
 
 class RegulatorRepo(BaseModel):
@@ -51,11 +82,28 @@ class RegulatorRepo(BaseModel):
     Password: str
     Type: str
     InitSchema: bool = True
+    MinConnections: int = 1
+    MaxConnections: int = 10
+    PermissionCache: RegulatorRepoPermissionCache = RegulatorRepoPermissionCache()
+
+
+class WebhookJournal(BaseModel):
+    Enabled: bool = False
+    Path: str = "logs/webhooks.db"
+    FlushIntervalMs: int = 5
+    MaxAttempts: int = 5
+    RetentionHours: int = 72
+
+
+# поле Secondary.WebhookJournal со значением по умолчанию перекрывает в теле класса имя типа,
+# поэтому аннотация ссылается на псевдоним
+_WebhookJournal = WebhookJournal
 
 
 class Secondary(BaseModel):
     AdminProvider: AdminProvider
     RegulatorRepo: RegulatorRepo
+    WebhookJournal: _WebhookJournal = _WebhookJournal()
 
 
 class Adapters(BaseModel):
@@ -73,7 +121,16 @@ class Regulator(BaseModel):
     Alias: str = "REGULATOR"
 
 
+class Ledger(BaseModel):
+    BatchParallelism: int = 4
+
+
+# см. _WebhookJournal
+_Ledger = Ledger
+
+
 class Config(BaseModel):
     App: App
     Regulator: Regulator
+    Ledger: _Ledger = _Ledger()
     Adapters: Adapters
@@ -1,12 +1,14 @@
 import json
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from hospital_controller.internal.admin_provider.admin_provider import AdminProvider
 from hospital_controller.internal.domain import requests as domain
 from hospital_controller.internal.regulator_repo.repo import HospitalRepo
+from hospital_controller.pkg.single_flight import SingleFlight
 
 
 class Handler:
@@ -20,11 +22,13 @@ class Handler:
     - дальнейшую регистрацию схем/cred-def только при наличии разрешения
     """
 
-    def __init__(self, admin_provider: AdminProvider, repo: Optional[HospitalRepo], regulator_did: str, regulator_alias: str = "REGULATOR"):
+    def __init__(self, admin_provider: AdminProvider, repo: Optional[HospitalRepo], regulator_did: str, regulator_alias: str = "REGULATOR",
+                 batch_parallelism: int = 4):
         self.admin_provider = admin_provider
         self.repo = repo
         self.regulator_did = regulator_did
         self.regulator_alias = regulator_alias
+        self.batch_parallelism = max(1, batch_parallelism)
 
         # active_connections: {their_did_or_alias: connection_id}
         self.active_connections: Dict[str, str] = {}
@@ -32,6 +36,14 @@ class Handler:
         # pending permission requests: {request_id: {vc_type, created_at, status}}
         self.pending_permissions: Dict[str, Dict[str, Any]] = {}
 
+        # кэш идентификаторов в блокчейне (не меняются после записи):
+        # (schema_name, schema_version) -> schema_id, (schema_id, tag) -> cred_def_id
+        self.schema_ids: Dict[Tuple[str, str], str] = {}
+        self.cred_def_ids: Dict[Tuple[str, str], str] = {}
+        # одновременные запросы одной схемы/cred-def схлопываются в одну запись в блокчейн
+        self.ledger_flight = SingleFlight()
+        self.warm_ledger_cache()
+
     # -------------------- Webhooks --------------------
     def handle_connection_webhook(self, message: dict) -> bool:
         try:
@@ -348,10 +360,98 @@ class Handler:
                     "vc_type": vc_type,
                 }, False
 
-        # 1) schema find/create
+        return self._register_schema_and_cred_def(vc_type, schema_name, schema_version, attributes)
+
+    def create_schemas_and_cred_defs(self, items: List[dict]) -> Iterator[dict]:
+        """Пакетная регистрация schema+cred-def для нескольких vc_type.
+
+        Разрешения проверяются одним SQL-запросом на весь пакет, записи в блокчейн идут
+        параллельно (не больше batch_parallelism одновременно). Генератор отдаёт результат
+        по каждому элементу по мере готовности ({"index", "vc_type", "ok", ...}),
+        последним — итог {"done": True, "total", "succeeded", "failed"}.
+        """
+        results = []
+        to_register = []
+        for index, item in enumerate(items):
+            item = item if isinstance(item, dict) else {}
+            attributes = item.get("attributes")
+            if not item.get("vc_type") or not item.get("schema_name") or not (isinstance(attributes, list) and attributes):
+                results.append({"index": index, "vc_type": item.get("vc_type"), "ok": False,
+                                "error": "vc_type, schema_name, attributes(list) are required"})
+                continue
+            to_register.append((index, item))
+
+        if self.repo and to_register:
+            permitted, ok = self.repo.get_permitted_vc_types({item["vc_type"] for _, item in to_register})
+            allowed = []
+            for index, item in to_register:
+                if item["vc_type"] in permitted:
+                    allowed.append((index, item))
+                elif not ok:
+                    # ошибка БД — не отказ регулятора: элемент можно повторить
+                    results.append({"index": index, "vc_type": item["vc_type"], "ok": False,
+                                    "error": "Permission check failed: database error"})
+                else:
+                    results.append({"index": index, "vc_type": item["vc_type"], "ok": False,
+                                    "error": "Not authorized for this vc_type. Request permission first."})
+            to_register = allowed
+
+        yield from results
+
+        succeeded = 0
+        if to_register:
+            with ThreadPoolExecutor(max_workers=self.batch_parallelism) as executor:
+                futures = {
+                    executor.submit(self._register_schema_and_cred_def, item["vc_type"], item["schema_name"],
+                                    item.get("schema_version", "1.0.0"), item["attributes"]): index
+                    for index, item in to_register
+                }
+                for future in as_completed(futures):
+                    try:
+                        resp, ok = future.result()
+                    except Exception as e:
+                        logging.error(f"Batch schema/cred-def registration error: {e}")
+                        resp, ok = {"error": str(e)}, False
+                    succeeded += ok
+                    yield {"index": futures[future], **resp, "ok": ok}
+
+        yield {"done": True, "total": len(items), "succeeded": succeeded, "failed": len(items) - succeeded}
+
+    def _register_schema_and_cred_def(self, vc_type: str, schema_name: str, schema_version: str, attributes: list) -> Tuple[dict, bool]:
+        # 1) schema: кэш -> find/create (один вызов на ключ одновременно)
+        schema_key = (schema_name, schema_version)
+        schema_id = self.schema_ids.get(schema_key)
+        if not schema_id:
+            schema_id, err = self.ledger_flight.do(
+                ("schema",) + schema_key,
+                lambda: self._find_or_create_schema(schema_name, schema_version, attributes),
+            )
+            if err:
+                return err, False
+
+        # 2) cred-def: кэш -> find/create
+        cred_def_key = (schema_id, vc_type)
+        cred_def_id = self.cred_def_ids.get(cred_def_key)
+        if not cred_def_id:
+            cred_def_id, err = self.ledger_flight.do(
+                ("cred_def",) + cred_def_key,
+                lambda: self._find_or_create_cred_def(schema_id, vc_type),
+            )
+            if err:
+                return err, False
+
+        return {"ok": True, "vc_type": vc_type, "schema_id": schema_id, "cred_def_id": cred_def_id}, True
+
+    def _find_or_create_schema(self, schema_name: str, schema_version: str, attributes: list) -> Tuple[Optional[str], Optional[dict]]:
+        key = (schema_name, schema_version)
+        if key in self.schema_ids:
+            return self.schema_ids[key], None
+
+        # schema_id в Indy: <did>:2:<name>:<version> — берём схему именно этой версии
         schema_find, ok = self.admin_provider.schema_created(schema_name)
-        if ok and schema_find.get("schema_ids"):
-            schema_id = schema_find["schema_ids"][0]
+        found = [sid for sid in (schema_find or {}).get("schema_ids", []) if sid.endswith(f":{schema_version}")] if ok else []
+        if found:
+            schema_id = found[0]
         else:
             schema_body = {
                 "schema_name": schema_name,
@@ -360,28 +460,62 @@ class Handler:
             }
             schema_resp, ok = self.admin_provider.schema_create(schema_body)
             if not ok:
-                return {"error": "Schema create failed", "details": schema_resp}, False
+                return None, {"error": "Schema create failed", "details": schema_resp}
             schema_id = schema_resp.get("schema_id")
 
         if not schema_id:
-            return {"error": "No schema_id"}, False
+            return None, {"error": "No schema_id"}
 
-        # 2) cred-def find/create
+        self.schema_ids[key] = schema_id
+        if self.repo:
+            self.repo.save_ledger_schema(schema_name, schema_version, schema_id)
+        return schema_id, None
+
+    def _find_or_create_cred_def(self, schema_id: str, tag: str) -> Tuple[Optional[str], Optional[dict]]:
+        key = (schema_id, tag)
+        if key in self.cred_def_ids:
+            return self.cred_def_ids[key], None
+
+        # cred_def_id в Indy: <did>:3:CL:<seq_no>:<tag>
         cred_def_find, ok = self.admin_provider.cred_def_created(schema_id)
-        if ok and cred_def_find.get("credential_definition_ids"):
-            cred_def_id = cred_def_find["credential_definition_ids"][0]
+        found = [cid for cid in (cred_def_find or {}).get("credential_definition_ids", []) if cid.endswith(f":{tag}")] if ok else []
+        if found:
+            cred_def_id = found[0]
         else:
             cred_def_body = {
                 "schema_id": schema_id,
                 "support_revocation": False,
-                "tag": vc_type,
+                "tag": tag,
             }
             cred_def_resp, ok = self.admin_provider.cred_def_create(cred_def_body)
             if not ok:
-                return {"error": "CredDef create failed", "details": cred_def_resp}, False
+                return None, {"error": "CredDef create failed", "details": cred_def_resp}
             cred_def_id = cred_def_resp.get("credential_definition_id")
 
-        return {"ok": True, "vc_type": vc_type, "schema_id": schema_id, "cred_def_id": cred_def_id}, True
+        if not cred_def_id:
+            return None, {"error": "No cred_def_id"}
+
+        self.cred_def_ids[key] = cred_def_id
+        if self.repo:
+            self.repo.save_ledger_cred_def(schema_id, tag, cred_def_id)
+        return cred_def_id, None
+
+    def warm_ledger_cache(self):
+        """Загружает известные schema_id/cred_def_id из БД, чтобы повторные вызовы не ходили в ACA-Py."""
+        if not self.repo:
+            return
+
+        schemas, ok = self.repo.list_ledger_schemas()
+        if ok:
+            for row in schemas:
+                self.schema_ids[(row["schema_name"], row["schema_version"])] = row["schema_id"]
+
+        cred_defs, ok = self.repo.list_ledger_cred_defs()
+        if ok:
+            for row in cred_defs:
+                self.cred_def_ids[(row["schema_id"], row["tag"])] = row["cred_def_id"]
+
+        logging.info(f"Ledger cache warmed: {len(self.schema_ids)} schemas, {len(self.cred_def_ids)} cred defs")
 
     def list_permissions(self) -> Tuple[dict, bool]:
         if not self.repo:
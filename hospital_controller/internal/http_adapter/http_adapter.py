@@ -1,24 +1,35 @@
 import json
 import logging
+from typing import Optional
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 
 from hospital_controller.internal.domain.config import HttpAdapter as ConfigHttpAdapter
 from hospital_controller.internal.handlers.handlers import Handler
 from hospital_controller.internal.http_adapter.routes import get_routes
+from hospital_controller.internal.http_adapter.server import run_server
+from hospital_controller.internal.webhook_journal.webhook_journal import WebhookJournal
+from hospital_controller.internal.webhook_queue.webhook_queue import WebhookQueue
+from hospital_controller.pkg import metrics
 
 
 class HttpAdapter(object):
     app = None
 
-    def __init__(self, name: str, handler: Handler, config: ConfigHttpAdapter):
+    def __init__(self, name: str, handler: Handler, config: ConfigHttpAdapter, journal: Optional[WebhookJournal] = None):
         self.app = Flask(name)
         self.handler = handler
         self.config = config
+        self.journal = journal
         self.app.logger.setLevel(logging.INFO)
 
+        self.webhook_queue = None
+        if config.WebhookQueue.Enabled:
+            self.webhook_queue = WebhookQueue(self.process_webhook, config.WebhookQueue, on_done=self.journal_mark)
+            self.register_webhook_queue_metrics()
+
     def run(self):
-        self.app.run(host='0.0.0.0', port=self.config.Port, debug=True)
+        run_server(self.app, self.config)
 
     def add_endpoint(self, path=None, methods=None, name=None, handler=None):
         self.app.add_url_rule(rule=path, endpoint=name, methods=methods, view_func=handler)
@@ -28,6 +39,35 @@ class HttpAdapter(object):
         message = request.json or {}
         logging.info(f"[Hospital Webhook] Topic: {topic}, Message: {json.dumps(message, indent=2, ensure_ascii=False)}")
 
+        entry_id = None
+        if self.journal:
+            entry_id = self.journal.append(topic, message)
+            if entry_id is None:
+                return jsonify({"status": "journal error"}), 503
+
+        if self.webhook_queue:
+            if not self.webhook_queue.submit(topic, message, ref=entry_id):
+                if entry_id is not None:
+                    self.journal.discard(entry_id)
+                return jsonify({"status": "busy"}), 503
+            return jsonify({"status": "queued"}), 200
+
+        ok = self.process_webhook(topic, message)
+        self.journal_mark(entry_id, ok)
+        if not ok:
+            return jsonify({"status": "failed"}), 500
+
+        return jsonify({"status": "processed"}), 200
+
+    def journal_mark(self, entry_id: Optional[int], ok: bool):
+        if self.journal is None or entry_id is None:
+            return
+        if ok:
+            self.journal.complete(entry_id)
+        else:
+            self.journal.fail(entry_id)
+
+    def process_webhook(self, topic: str, message: dict) -> bool:
         ok = True
         if topic == 'connections':
             ok = self.handler.handle_connection_webhook(message)
@@ -38,10 +78,26 @@ class HttpAdapter(object):
         elif topic == 'issue_credential_v2_0':
             ok = self.handler.handle_issue_credential_webhook(message)
 
-        if not ok:
-            return jsonify({"status": "failed"}), 500
+        return ok
 
-        return jsonify({"status": "processed"}), 200
+    def webhook_queue_stats(self):
+        if not self.webhook_queue:
+            return jsonify({"enabled": False}), 200
+        return jsonify({"enabled": True, **self.webhook_queue.stats()}), 200
+
+    def register_webhook_queue_metrics(self):
+        def stat(label_to_key):
+            return lambda: [((label,) if label else (), self.webhook_queue.stats()[key]) for label, key in label_to_key]
+
+        metrics.REGISTRY.gauge_callback("webhook_queue_depth", "Webhooks waiting in the queue", [],
+                                        stat([(None, "depth")]))
+        metrics.REGISTRY.gauge_callback("webhook_queue_events", "Webhook queue event counts since start", ["event"],
+                                        stat([(k, k) for k in ("enqueued", "rejected", "processed", "failed")]))
+        metrics.REGISTRY.gauge_callback("webhook_queue_lag_seconds", "Time from enqueue to processing start", ["stat"],
+                                        stat([(k, f"lag_seconds_{k}") for k in ("last", "max", "avg")]))
+
+    def metrics(self):
+        return Response(metrics.REGISTRY.render(), mimetype=metrics.CONTENT_TYPE)
 
     # --- API ---
     def create_invitation(self):
@@ -91,9 +147,26 @@ class HttpAdapter(object):
         resp, ok = self.handler.create_schema_and_cred_def(vc_type, schema_name, schema_version, attributes)
         return jsonify(resp), (200 if ok else 500)
 
+    def create_schemas_and_cred_defs(self):
+        body = request.json or {}
+        items = body.get('items')
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "items(list) is required"}), 400
+
+        # прогресс отдаём построчно (NDJSON) по мере регистрации каждого элемента
+        def generate():
+            for result in self.handler.create_schemas_and_cred_defs(items):
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def run_http_adapter(name: str = "hospital", handler=None, config: ConfigHttpAdapter = None, journal: WebhookJournal = None):
+    http_adapter = HttpAdapter(name, handler, config, journal)
 
-def run_http_adapter(name: str = "hospital", handler=None, config: ConfigHttpAdapter = None):
-    http_adapter = HttpAdapter(name, handler, config)
+    # вебхуки, не обработанные до остановки/падения контроллера
+    if journal:
+        journal.replay(http_adapter.process_webhook)
 
     routes = get_routes(http_adapter)
 
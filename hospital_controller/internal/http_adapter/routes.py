@@ -12,6 +12,18 @@ def get_routes(http_adapter: 'HttpAdapter'):
             "name": "hospital_webhooks",
             "handler": http_adapter.handle_hospital_webhooks,
         },
+        {
+            "path": "/webhooks/stats/",
+            "methods": ["GET"],
+            "name": "webhook_queue_stats",
+            "handler": http_adapter.webhook_queue_stats,
+        },
+        {
+            "path": "/metrics",
+            "methods": ["GET"],
+            "name": "metrics",
+            "handler": http_adapter.metrics,
+        },
         {
             "path": "/invitation/",
             "methods": ["POST"],
@@ -48,6 +60,12 @@ def get_routes(http_adapter: 'HttpAdapter'):
             "name": "create_schema_and_cred_def",
             "handler": http_adapter.create_schema_and_cred_def,
         },
+        {
+            "path": "/ledger/schema-creddef/batch/",
+            "methods": ["POST"],
+            "name": "create_schemas_and_cred_defs",
+            "handler": http_adapter.create_schemas_and_cred_defs,
+        },
     ]
 
     return routes
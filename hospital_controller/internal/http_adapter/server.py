@@ -0,0 +1,61 @@
+import logging
+
+from flask import Flask
+
+from hospital_controller.internal.domain.config import HttpAdapter as ConfigHttpAdapter
+
+SERVER_DEV = "dev"
+SERVER_GTHREAD = "gthread"
+SERVER_ASGI = "asgi"
+
+
+def run_dev(app: Flask, config: ConfigHttpAdapter):
+    app.run(host=config.Host, port=config.Port, debug=config.Debug)
+
+
+def run_gunicorn(app, config: ConfigHttpAdapter, worker_class: str):
+    """Запуск приложения под gunicorn без отдельного WSGI-модуля.
+
+    gunicorn/uvicorn импортируются лениво: для режима dev они не нужны
+    (gunicorn к тому же не работает на Windows).
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class _Application(BaseApplication):
+        def __init__(self, application, options: dict):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        "bind": f"{config.Host}:{config.Port}",
+        "workers": config.Workers,
+        "worker_class": worker_class,
+        "accesslog": "-",
+    }
+    if worker_class == SERVER_GTHREAD:
+        options["threads"] = config.Threads
+
+    _Application(app, options).run()
+
+
+def run_server(app: Flask, config: ConfigHttpAdapter):
+    if config.Server == SERVER_DEV:
+        run_dev(app, config)
+    elif config.Server == SERVER_GTHREAD:
+        run_gunicorn(app, config, worker_class=SERVER_GTHREAD)
+    elif config.Server == SERVER_ASGI:
+        from asgiref.wsgi import WsgiToAsgi
+
+        run_gunicorn(WsgiToAsgi(app), config, worker_class="uvicorn.workers.UvicornWorker")
+    else:
+        raise ValueError(f"Unknown HttpAdapter.Server: {config.Server}")
+
+    logging.info(f"HTTP server ({config.Server}) stopped")
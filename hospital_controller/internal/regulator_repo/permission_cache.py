@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from typing import Optional
+
+import psycopg2
+import psycopg2.extensions
+
+from hospital_controller.internal.domain.config import RegulatorRepo as ConfigRegulatorRepo
+from hospital_controller.pkg.ttl_cache import TTLCache
+
+
+class PermissionCache:
+    """Кэш разрешений регулятора (vc_type -> есть ли VC-разрешение) в памяти процесса.
+
+    - Хранит и положительные, и отрицательные ответы has_permission (TTL — страховка
+      на случай потерянного уведомления).
+    - save_permission_vc заполняет кэш сразу и публикует NOTIFY в NotifyChannel;
+      остальные процессы контроллера получают его через LISTEN и сбрасывают запись.
+    - Свои уведомления (по origin) игнорируются; origin включает pid, поэтому воркеры
+      gunicorn, унаследовавшие объект от мастера, различают уведомления друг друга.
+    - Пока LISTEN не подтверждён, ответы не кэшируются: иначе уведомление, пришедшее
+      до подписки, не сбросило бы запись. После (пере)подключения слушателя кэш
+      очищается целиком, т.к. уведомления за время разрыва потеряны.
+    - Ответ, прочитанный из БД, кэшируется с поколением (generation), взятым до запроса:
+      если между ними пришло уведомление, поколение сменилось и ответ не сохраняется.
+    """
+
+    def __init__(self, config: ConfigRegulatorRepo):
+        self.config = config
+        self.channel = config.PermissionCache.NotifyChannel
+        self.cache = TTLCache(max_size=config.PermissionCache.MaxSize, ttl=config.PermissionCache.TTLSeconds)
+        self._instance = uuid.uuid4().hex
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._listening = threading.Event()
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+    @property
+    def origin(self) -> str:
+        return f"{self._instance}:{os.getpid()}"
+
+    def get(self, vc_type: str) -> Optional[bool]:
+        self._ensure_listener()
+        return self.cache.get(vc_type)
+
+    @property
+    def generation(self) -> int:
+        """Брать до чтения из БД и передавать в set()."""
+        return self._generation
+
+    def set(self, vc_type: str, has: bool, generation: Optional[int] = None):
+        self._ensure_listener()
+        if self.channel and not self._listening.is_set():
+            return
+        with self._generation_lock:
+            if generation is not None and generation != self._generation:
+                return
+            self.cache.set(vc_type, has)
+
+    def invalidate(self, vc_type: Optional[str] = None):
+        """Сбрасывает запись (или весь кэш) и отменяет сохранение ответов, прочитанных до этого."""
+        with self._generation_lock:
+            self._generation += 1
+            if vc_type:
+                self.cache.delete(vc_type)
+            else:
+                self.cache.clear()
+
+    def notify_payload(self, vc_type: str) -> str:
+        return json.dumps({"vc_type": vc_type, "origin": self.origin})
+
+    # --- LISTEN ---
+    def _ensure_listener(self):
+        # поток слушателя не переживает fork (gunicorn), поэтому стартуем его в каждом процессе
+        if not self.channel or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            # состояние, унаследованное от родителя через fork, к этому процессу не относится
+            self._listening = threading.Event()
+            self.invalidate()
+            threading.Thread(target=self._listen_forever, name="permission-cache-listener", daemon=True).start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                logging.warning(f"Permission cache listener error, reconnecting: {e}")
+            time.sleep(1)
+
+    def _listen(self):
+        conn = psycopg2.connect(
+            host=self.config.Host,
+            port=self.config.Port,
+            database=self.config.Name,
+            user=self.config.User,
+            password=self.config.Password,
+            # без трафика оборванное соединение иначе не обнаружить: select ждал бы вечно,
+            # а кэш отдавал бы записи, уведомления о которых уже не приходят
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3,
+        )
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+
+            self.invalidate()
+            self._listening.set()
+
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self._on_notify(conn.notifies.pop(0).payload)
+        finally:
+            self._listening.clear()
+            conn.close()
+
+    def _on_notify(self, payload: str):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            data = {"vc_type": payload}
+
+        if data.get("origin") == self.origin:
+            return
+
+        self.invalidate(data.get("vc_type"))
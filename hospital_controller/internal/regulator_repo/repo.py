@@ -1,11 +1,51 @@
 import json
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
+import psycopg2.pool
 
 from hospital_controller.internal.domain.config import RegulatorRepo as ConfigRegulatorRepo
+from hospital_controller.internal.regulator_repo.permission_cache import PermissionCache
+
+# Ошибки, после которых соединение считается потерянным (рестарт Postgres, обрыв сети)
+RECONNECT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# Горячие запросы, которые готовятся на сервере (PREPARE) один раз на соединение: name -> (типы параметров, SQL)
+PREPARED_STATEMENTS = {
+    "has_permission": (
+        "(text)",
+        'SELECT 1 AS ok FROM public."REGULATOR_PERMISSIONS" WHERE vc_type=$1 LIMIT 1',
+    ),
+    "get_institution": (
+        "",
+        'SELECT * FROM public."INSTITUTION" ORDER BY created_at DESC LIMIT 1',
+    ),
+    "save_permission_vc": (
+        "(text, text, text, jsonb)",
+        '''INSERT INTO public."REGULATOR_PERMISSIONS" (vc_type, cred_ex_id, credential_id, raw_record)
+        VALUES ($1, $2, $3, $4)
+        ON CONFLICT (cred_ex_id) DO UPDATE
+        SET vc_type=EXCLUDED.vc_type,
+            credential_id=EXCLUDED.credential_id,
+            raw_record=EXCLUDED.raw_record''',
+    ),
+}
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Соединение пула: autocommit, JSON-адаптеры и список уже подготовленных statement'ов."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        psycopg2.extras.register_default_json(self)
+        psycopg2.extras.register_default_jsonb(self)
+        self.autocommit = True
+        self.prepared = set()
 
 
 class HospitalRepo:
@@ -17,50 +57,113 @@ class HospitalRepo:
     - Ниже мы используем register_default_json/jsonb и RealDictCursor,
       поэтому fetch* возвращает dict, а JSONB поля уже распарсены.
     - Если в вашей БД JSON хранится как TEXT/VARCHAR, тогда придётся делать json.loads вручную.
+
+    Про соединения:
+    - Репозиторий держит ThreadedConnectionPool (MinConnections..MaxConnections);
+      каждый вызов берёт соединение из пула и заводит свой курсор, поэтому потоки Flask
+      и обработчики очереди вебхуков не делят один курсор.
+    - Если свободных соединений нет, вызов ждёт, а не падает с PoolError.
+    - При потере соединения (рестарт Postgres) оно выбрасывается из пула,
+      а запрос один раз повторяется на новом соединении. Прочие OperationalError
+      (deadlock, отмена запроса) не повторяются: запрос мог уже выполниться.
+    - Пул создаётся заново в каждом процессе: воркеры gunicorn не используют сокеты,
+      открытые мастером до fork.
     """
 
     def __init__(self, config: ConfigRegulatorRepo):
         self.config = config
-        self.connection = None
-        self.cursor = None
+        self.pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        self._inherited_pool = None
+        self._slots = threading.BoundedSemaphore(config.MaxConnections)
+        self.permission_cache = PermissionCache(config) if config.PermissionCache.Enabled else None
         self.connect()
 
         if getattr(config, "InitSchema", True):
             self.init_schema()
 
     def connect(self):
-        self.connection = psycopg2.connect(
+        self.pool = psycopg2.pool.ThreadedConnectionPool(
+            self.config.MinConnections,
+            self.config.MaxConnections,
             host=self.config.Host,
             port=self.config.Port,
             database=self.config.Name,
             user=self.config.User,
             password=self.config.Password,
+            connection_factory=PooledConnection,
         )
-        psycopg2.extras.register_default_json(self.connection)
-        psycopg2.extras.register_default_jsonb(self.connection)
+        self._pool_pid = os.getpid()
 
-        self.cursor = self.connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        self.connection.autocommit = True
+    def _get_pool(self) -> psycopg2.pool.ThreadedConnectionPool:
+        if self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool_pid != os.getpid():
+                    # соединения родителя нельзя ни использовать, ни закрывать (close отправил бы
+                    # Terminate в общий сокет): держим ссылку, чтобы сборщик мусора их не трогал
+                    self._inherited_pool = self.pool
+                    self.connect()
+        return self.pool
 
     def close_connection(self):
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
+        if self.pool:
+            self.pool.closeall()
+
+    def _run(self, fn: Callable[[PooledConnection, Any], Any]) -> Any:
+        """Выполняет fn(conn, cursor) на соединении из пула; при обрыве соединения — один повтор."""
+        with self._slots:
+            pool = self._get_pool()
+            for attempt in range(2):
+                conn = pool.getconn()
+                try:
+                    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                        result = fn(conn, cursor)
+                except RECONNECT_ERRORS as e:
+                    # проверяем до putconn: с close=True он сам закрыл бы соединение
+                    lost = bool(conn.closed)
+                    pool.putconn(conn, close=lost)
+                    if attempt or not lost:
+                        raise
+                    logging.warning(f"DB connection lost, reconnecting: {e}")
+                    continue
+                except Exception:
+                    pool.putconn(conn)
+                    raise
+
+                pool.putconn(conn)
+                return result
+
+    @staticmethod
+    def _execute_prepared(conn: PooledConnection, cursor, name: str, params: tuple = ()):
+        if name not in conn.prepared:
+            types, sql = PREPARED_STATEMENTS[name]
+            cursor.execute(f"PREPARE {name} {types} AS {sql}")
+            conn.prepared.add(name)
+
+        if params:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cursor.execute(f"EXECUTE {name}")
 
     def execute_and_fetch(self, sql: str, params: Optional[tuple] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        def fn(conn, cursor):
+            cursor.execute(sql, params)
+            return list(cursor.fetchall())
+
         try:
-            self.cursor.execute(sql, params)
-            result = self.cursor.fetchall()
-            return list(result), True
+            return self._run(fn), True
         except Exception as e:
             logging.error(f"DB execute_and_fetch error: {e}")
             return [], False
 
     def execute_and_fetch_one(self, sql: str, params: Optional[tuple] = None) -> Tuple[Optional[Dict[str, Any]], bool]:
+        def fn(conn, cursor):
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
         try:
-            self.cursor.execute(sql, params)
-            result = self.cursor.fetchone()
+            result = self._run(fn)
             return (dict(result) if result else None), True
         except Exception as e:
             logging.error(f"DB execute_and_fetch_one error: {e}")
@@ -68,12 +171,25 @@ class HospitalRepo:
 
     def execute(self, sql: str, params: Optional[tuple] = None) -> bool:
         try:
-            self.cursor.execute(sql, params)
+            self._run(lambda conn, cursor: cursor.execute(sql, params))
             return True
         except Exception as e:
             logging.error(f"DB execute error: {e}")
             return False
 
+    def execute_prepared(self, name: str, params: tuple = (), fetch: bool = False) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Выполняет подготовленный statement из PREPARED_STATEMENTS; fetch=True — вернуть первую строку."""
+        def fn(conn, cursor):
+            self._execute_prepared(conn, cursor, name, params)
+            return cursor.fetchone() if fetch else None
+
+        try:
+            result = self._run(fn)
+            return (dict(result) if result else None), True
+        except Exception as e:
+            logging.error(f"DB execute_prepared {name} error: {e}")
+            return None, False
+
     # --- Schema ---
     def init_schema(self) -> bool:
         """Создаёт таблицы, если их нет."""
@@ -111,6 +227,23 @@ class HospitalRepo:
             cred_def_id TEXT,
             created_at TIMESTAMPTZ DEFAULT NOW()
         );
+
+        -- Кэш разрешения идентификаторов в блокчейне: schema/cred-def, однажды записанные, не меняются
+        CREATE TABLE IF NOT EXISTS public."LEDGER_SCHEMAS" (
+            schema_name TEXT NOT NULL,
+            schema_version TEXT NOT NULL,
+            schema_id TEXT NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            PRIMARY KEY (schema_name, schema_version)
+        );
+
+        CREATE TABLE IF NOT EXISTS public."LEDGER_CRED_DEFS" (
+            schema_id TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            cred_def_id TEXT NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            PRIMARY KEY (schema_id, tag)
+        );
         '''
         return self.execute(sql)
 
@@ -129,30 +262,86 @@ class HospitalRepo:
         return self.execute(sql, (did,))
 
     def get_institution(self) -> Tuple[Optional[Dict[str, Any]], bool]:
-        sql = 'SELECT * FROM public."INSTITUTION" ORDER BY created_at DESC LIMIT 1'
-        return self.execute_and_fetch_one(sql)
+        return self.execute_prepared("get_institution", fetch=True)
 
     # --- Permissions ---
     def save_permission_vc(self, vc_type: str, cred_ex_id: str, raw_record: dict, credential_id: Optional[str] = None) -> bool:
-        sql = '''
-        INSERT INTO public."REGULATOR_PERMISSIONS" (vc_type, cred_ex_id, credential_id, raw_record)
-        VALUES (%s, %s, %s, %s::jsonb)
-        ON CONFLICT (cred_ex_id) DO UPDATE
-        SET vc_type=EXCLUDED.vc_type,
-            credential_id=EXCLUDED.credential_id,
-            raw_record=EXCLUDED.raw_record;
-        '''
-        return self.execute(sql, (vc_type, cred_ex_id, credential_id, json.dumps(raw_record)))
+        _, ok = self.execute_prepared("save_permission_vc", (vc_type, cred_ex_id, credential_id, json.dumps(raw_record)))
+
+        if ok and self.permission_cache:
+            self.permission_cache.set(vc_type, True)
+            self.execute('SELECT pg_notify(%s, %s)',
+                         (self.permission_cache.channel, self.permission_cache.notify_payload(vc_type)))
+        return ok
 
     def has_permission(self, vc_type: str) -> Tuple[bool, bool]:
-        sql = 'SELECT 1 AS ok FROM public."REGULATOR_PERMISSIONS" WHERE vc_type=%s LIMIT 1'
-        row, ok = self.execute_and_fetch_one(sql, (vc_type,))
+        if self.permission_cache:
+            cached = self.permission_cache.get(vc_type)
+            if cached is not None:
+                return cached, True
+            generation = self.permission_cache.generation
+
+        row, ok = self.execute_prepared("has_permission", (vc_type,), fetch=True)
+        if ok and self.permission_cache:
+            self.permission_cache.set(vc_type, row is not None, generation)
         return (row is not None), ok
 
+    def get_permitted_vc_types(self, vc_types) -> Tuple[set, bool]:
+        """Проверка разрешений для набора vc_type: промахи кэша — одним запросом `= ANY(%s)`."""
+        vc_types = set(vc_types)
+        permitted = set()
+        missing = vc_types
+        if self.permission_cache:
+            missing = set()
+            for vc_type in vc_types:
+                cached = self.permission_cache.get(vc_type)
+                if cached is None:
+                    missing.add(vc_type)
+                elif cached:
+                    permitted.add(vc_type)
+            generation = self.permission_cache.generation
+
+        if not missing:
+            return permitted, True
+
+        sql = 'SELECT DISTINCT vc_type FROM public."REGULATOR_PERMISSIONS" WHERE vc_type = ANY(%s)'
+        rows, ok = self.execute_and_fetch(sql, (list(missing),))
+        if not ok:
+            return permitted, False
+
+        found = {row["vc_type"] for row in rows}
+        if self.permission_cache:
+            for vc_type in missing:
+                self.permission_cache.set(vc_type, vc_type in found, generation)
+        return permitted | found, True
+
     def list_permissions(self) -> Tuple[List[Dict[str, Any]], bool]:
         sql = 'SELECT vc_type, issued_at, cred_ex_id FROM public."REGULATOR_PERMISSIONS" ORDER BY issued_at DESC'
         return self.execute_and_fetch(sql)
 
+    # --- Ledger IDs ---
+    def save_ledger_schema(self, schema_name: str, schema_version: str, schema_id: str) -> bool:
+        sql = '''
+        INSERT INTO public."LEDGER_SCHEMAS" (schema_name, schema_version, schema_id)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (schema_name, schema_version) DO UPDATE SET schema_id=EXCLUDED.schema_id
+        '''
+        return self.execute(sql, (schema_name, schema_version, schema_id))
+
+    def save_ledger_cred_def(self, schema_id: str, tag: str, cred_def_id: str) -> bool:
+        sql = '''
+        INSERT INTO public."LEDGER_CRED_DEFS" (schema_id, tag, cred_def_id)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (schema_id, tag) DO UPDATE SET cred_def_id=EXCLUDED.cred_def_id
+        '''
+        return self.execute(sql, (schema_id, tag, cred_def_id))
+
+    def list_ledger_schemas(self) -> Tuple[List[Dict[str, Any]], bool]:
+        return self.execute_and_fetch('SELECT schema_name, schema_version, schema_id FROM public."LEDGER_SCHEMAS"')
+
+    def list_ledger_cred_defs(self) -> Tuple[List[Dict[str, Any]], bool]:
+        return self.execute_and_fetch('SELECT schema_id, tag, cred_def_id FROM public."LEDGER_CRED_DEFS"')
+
     # --- Documents ---
     def save_document(self, doc_id, doc_type: str, payload: dict) -> bool:
         sql = 'INSERT INTO public."MEDICAL_DOCUMENTS" (doc_id, doc_type, payload) VALUES (%s,%s,%s::jsonb)'
@@ -0,0 +1,135 @@
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from hospital_controller.internal.domain.config import HttpAdapterWebhookQueue as ConfigWebhookQueue
+
+# Поля вебхука, задающие порядок обработки: события одного обмена обрабатываются строго по очереди
+ORDERING_FIELDS = ("pres_ex_id", "cred_ex_id", "connection_id")
+
+
+def ordering_key(topic: str, message: dict) -> str:
+    for field in ORDERING_FIELDS:
+        value = message.get(field)
+        if value:
+            return f"{field}:{value}"
+    return f"topic:{topic}"
+
+
+class WebhookQueue:
+    """Ограниченная in-process очередь вебхуков с пулом обработчиков.
+
+    Очередь разбита на шарды по числу Workers; каждый шард обслуживает один поток.
+    Шард выбирается по ordering_key (pres_ex_id / cred_ex_id / connection_id),
+    поэтому события одного обмена обрабатываются в порядке поступления,
+    а разные обмены — параллельно.
+
+    Потоки стартуют лениво при первом submit в текущем процессе: под gunicorn
+    приложение создаётся до fork, а потоки fork не переживают.
+    """
+
+    def __init__(self, process: Callable[[str, dict], bool], config: ConfigWebhookQueue,
+                 on_done: Optional[Callable[[Any, bool], None]] = None):
+        self.process = process
+        # on_done(ref, ok) вызывается после обработки каждого вебхука (например, отметка в журнале)
+        self.on_done = on_done
+        self.workers = max(1, config.Workers)
+        self.shard_size = max(1, config.MaxSize // self.workers)
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._shards: List[queue.Queue] = []
+
+        self._enqueued = 0
+        self._rejected = 0
+        self._processed = 0
+        self._failed = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._lag_last = 0.0
+        self._processing_sum = 0.0
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._shards = [queue.Queue(maxsize=self.shard_size) for _ in range(self.workers)]
+            for i, shard in enumerate(self._shards):
+                threading.Thread(target=self._worker, args=(shard,), name=f"webhook-worker-{i}", daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, topic: str, message: dict, ref: Any = None) -> bool:
+        """Ставит вебхук в очередь. False — очередь шарда переполнена (вызывающему стоит ответить 503)."""
+        self._ensure_started()
+
+        key = ordering_key(topic, message)
+        shard = self._shards[zlib.crc32(key.encode()) % self.workers]
+        try:
+            shard.put_nowait((time.monotonic(), topic, message, ref))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            logging.warning(f"[Webhook Queue] shard is full, rejected {topic} {key}")
+            return False
+
+        with self._lock:
+            self._enqueued += 1
+        return True
+
+    def _worker(self, shard: queue.Queue):
+        while True:
+            enqueued_at, topic, message, ref = shard.get()
+            started_at = time.monotonic()
+            lag = started_at - enqueued_at
+
+            try:
+                ok = self.process(topic, message)
+            except Exception as e:
+                logging.exception(f"[Webhook Queue] {topic} handler raised: {e}")
+                ok = False
+
+            processing = time.monotonic() - started_at
+            with self._lock:
+                self._processed += 1
+                if not ok:
+                    self._failed += 1
+                self._lag_sum += lag
+                self._lag_last = lag
+                self._lag_max = max(self._lag_max, lag)
+                self._processing_sum += processing
+
+            if not ok:
+                logging.error(f"[Webhook Queue] {topic} {ordering_key(topic, message)} failed")
+
+            if self.on_done:
+                try:
+                    self.on_done(ref, ok)
+                except Exception as e:
+                    logging.error(f"[Webhook Queue] on_done error: {e}")
+
+            shard.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [shard.qsize() for shard in self._shards]
+        with self._lock:
+            processed = self._processed
+            return {
+                "workers": self.workers,
+                "capacity": self.shard_size * self.workers,
+                "depth": sum(depths),
+                "shard_depth": depths,
+                "enqueued": self._enqueued,
+                "rejected": self._rejected,
+                "processed": processed,
+                "failed": self._failed,
+                "lag_seconds_last": self._lag_last,
+                "lag_seconds_max": self._lag_max,
+                "lag_seconds_avg": (self._lag_sum / processed) if processed else 0.0,
+                "processing_seconds_avg": (self._processing_sum / processed) if processed else 0.0,
+            }
@@ -6,6 +6,7 @@ from internal.domain import config as cfg
 from internal.admin_provider.admin_provider import AdminProvider
 from internal.handlers.handlers import Handler
 from internal.regulator_repo.repo import HospitalRepo
+from internal.webhook_journal.webhook_journal import WebhookJournal
 from internal.http_adapter.http_adapter import run_http_adapter
 
 
@@ -25,6 +26,7 @@ handler = Handler(
     repo=repo,
     regulator_did=config.Regulator.DID,
     regulator_alias=config.Regulator.Alias,
+    batch_parallelism=config.Ledger.BatchParallelism,
 )
 
 os.makedirs('logs', exist_ok=True)
@@ -37,7 +39,12 @@ logging.basicConfig(
     ]
 )
 
+journal = None
+if config.Adapters.Secondary.WebhookJournal.Enabled:
+    journal = WebhookJournal(config.Adapters.Secondary.WebhookJournal)
+
 run_http_adapter(
     handler=handler,
     config=config.Adapters.Primary.HttpAdapter,
+    journal=journal,
 )
@@ -1,9 +1,36 @@
 import logging
+import time
+from typing import Optional
+
 from regulator_controller.internal.domain.config import AdminProvider as ConfigAdminProvider
+from regulator_controller.pkg.metrics import REGISTRY
 import requests
 
-
-def send_request(method, url, headers, json) -> (any, bool):
+ADMIN_API_LATENCY = REGISTRY.histogram(
+    "admin_api_request_duration_seconds", "ACA-Py Admin API request latency", ["endpoint"])
+ADMIN_API_REQUESTS = REGISTRY.counter(
+    "admin_api_requests_total", "ACA-Py Admin API requests by HTTP status (error — no response)", ["endpoint", "status"])
+ADMIN_API_ERRORS = REGISTRY.counter(
+    "admin_api_errors_total", "ACA-Py Admin API requests that failed (non-2xx or exception)", ["endpoint"])
+ADMIN_API_BYTES_OUT = REGISTRY.counter(
+    "admin_api_request_bytes_total", "Bytes sent in ACA-Py Admin API request bodies", ["endpoint"])
+ADMIN_API_BYTES_IN = REGISTRY.counter(
+    "admin_api_response_bytes_total", "Bytes received in ACA-Py Admin API response bodies", ["endpoint"])
+
+
+def observe_admin_call(endpoint: str, status, seconds: float, bytes_out: int, bytes_in: int, ok: bool):
+    ADMIN_API_LATENCY.observe(seconds, endpoint)
+    ADMIN_API_REQUESTS.inc(endpoint, status)
+    ADMIN_API_BYTES_OUT.inc(endpoint, amount=bytes_out)
+    ADMIN_API_BYTES_IN.inc(endpoint, amount=bytes_in)
+    if not ok:
+        ADMIN_API_ERRORS.inc(endpoint)
+
+
+def send_request(method, url, headers, json, name: Optional[str] = None) -> (any, bool):
+    """name — имя эндпоинта из конфига, под которым вызов попадает в метрики /metrics."""
+    started_at = time.perf_counter()
+    observed = False
     try:
         response = requests.request(
             method=method,
@@ -11,6 +38,11 @@ def send_request(method, url, headers, json) -> (any, bool):
             headers=headers,
             json=json
         )
+        if name:
+            bytes_out = len(response.request.body or b"")
+            observe_admin_call(name, response.status_code, time.perf_counter() - started_at,
+                               bytes_out, len(response.content), response.status_code == 200)
+            observed = True
 
         if response.status_code == 200:
             logging.info(f"Send request to {url} completed")
@@ -20,6 +52,8 @@ def send_request(method, url, headers, json) -> (any, bool):
             return response.text, False
     except Exception as e:
         logging.error(f"Send request exception: {url} {e}")
+        if name and not observed:
+            observe_admin_call(name, "error", time.perf_counter() - started_at, 0, 0, False)
     return None, False
 
 
@@ -33,6 +67,7 @@ class AdminProvider:
         path = self.cfg.Endpoints.AcceptConnection.Path.replace('{connection_id}', connection_id)
 
         _, ok = send_request(
+            name="AcceptConnection",
             method=self.cfg.Endpoints.AcceptConnection.Method,
             url=self.url + path,
             headers=self.headers,
@@ -45,6 +80,7 @@ class AdminProvider:
         path = self.cfg.Endpoints.EndorseTransaction.Path.replace('{transaction_id}', transaction_id)
 
         _, ok = send_request(
+            name="EndorseTransaction",
             method=self.cfg.Endpoints.EndorseTransaction.Method,
             url=self.url + path,
             headers=self.headers,
@@ -55,6 +91,7 @@ class AdminProvider:
 
     def register_did(self, request) -> (any, bool):
         content, ok = send_request(
+            name="RegisterDID",
             method=self.cfg.Endpoints.RegisterDID.Method,
             url=self.url + self.cfg.Endpoints.RegisterDID.Path,
             headers=self.headers,
@@ -67,6 +104,7 @@ class AdminProvider:
 
     def register_nym(self, request) -> (any, bool):
         content, ok = send_request(
+            name="RegisterNYM",
             method=self.cfg.Endpoints.RegisterNYM.Method,
             url=self.url + self.cfg.Endpoints.RegisterNYM.Path,
             headers=self.headers,
@@ -82,6 +120,7 @@ class AdminProvider:
         path = self.cfg.Endpoints.SendMessage.Path.replace('{connection_id}', connection_id)
 
         response, ok = send_request(
+            name="SendMessage",
             method=self.cfg.Endpoints.SendMessage.Method,
             url=self.url + path,
             headers=self.headers,
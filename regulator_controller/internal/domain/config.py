@@ -36,11 +36,40 @@ class RegulatorRepo(BaseModel):
     User: str
     Password: str
     Type: str
+    MinConnections: int = 1
+    MaxConnections: int = 10
+    Migrate: bool = True
+
+
+class WebhookJournal(BaseModel):
+    Enabled: bool = False
+    Path: str = "logs/webhooks.db"
+    FlushIntervalMs: int = 5
+    MaxAttempts: int = 5
+    RetentionHours: int = 72
+
+
+# поле Secondary.WebhookJournal со значением по умолчанию перекрывает в теле класса имя типа,
+# поэтому аннотация ссылается на псевдоним
+_WebhookJournal = WebhookJournal
+
+
+class PermissionIndex(BaseModel):
+    Enabled: bool = True
+    NegativeCacheSize: int = 10000
+    NegativeCacheTTL: float = 60
+    ReconnectInterval: float = 5
+
+
+# см. _WebhookJournal
+_PermissionIndex = PermissionIndex
 
 
 class Secondary(BaseModel):
     AdminProvider: AdminProvider
     RegulatorRepo: RegulatorRepo
+    WebhookJournal: _WebhookJournal = _WebhookJournal()
+    PermissionIndex: _PermissionIndex = _PermissionIndex()
 
 
 class Adapters(BaseModel):
@@ -5,20 +5,95 @@ from datetime import datetime
 
 from regulator_controller.internal.admin_provider.admin_provider import AdminProvider
 from regulator_controller.internal.domain import requests
+from regulator_controller.internal.permission_index import permission_index as pi
+
+PERMISSION_REASONS = {
+    pi.AUTHORIZED: 'Учреждение имеет право выпускать данный тип документов',
+    pi.NOT_APPROVED: 'Учреждение не имеет право выпускать данный тип документов',
+    pi.NOT_REGISTERED: 'Учреждение не зарегистрировано',
+}
+
+# Пачка проверок одним запросом: пары с порядковым номером через unnest и LEFT JOIN
+CHECK_PERMISSIONS_SQL = (
+    'SELECT q.ord, ri.institution_did IS NOT NULL AS registered, cia.institution_did IS NOT NULL AS approved '
+    'FROM unnest(%s::integer[], %s::integer[]) WITH ORDINALITY AS q(institution_did, vc_type, ord) '
+    'LEFT JOIN public."REGISTERED_INSTITUTIONS" ri ON ri.institution_did = q.institution_did '
+    'LEFT JOIN public."CREDENTIAL_INSTITUTION_APPROVE" cia ON cia.institution_did = q.institution_did '
+    'AND cia.vc_type = q.vc_type AND cia.date_approve IS NOT NULL'
+)
+
+
+# Поля списков (проекция ?fields=...): имя поля -> SQL-выражение
+INSTITUTION_FIELDS = {
+    'institution_did': 'ri.institution_did',
+    'institution_type': 'ri.institution_type',
+    'institution_name': 'ri.institution_name',
+    'connection_id': 'ri.connection_id',
+    'registration_date': 'ri.registration_date',
+    'permissions': "COALESCE(p.permissions, '[]'::json)",
+}
+
+# Одобренные типы документов учреждения одним массивом вместо строки на каждую пару ri x cia x ac;
+# LATERAL выполняется только для строк страницы и только если поле запрошено
+PERMISSIONS_LATERAL = (
+    ' LEFT JOIN LATERAL (SELECT json_agg(json_build_object('
+    "'vc_type', cia.vc_type, 'vc_name', ac.vc_name, 'vc_short_name', ac.vc_short_name, 'date_approve', cia.date_approve"
+    ') ORDER BY cia.vc_type) AS permissions '
+    'FROM public."CREDENTIAL_INSTITUTION_APPROVE" cia '
+    'LEFT JOIN public."APPROVED_CREDENTIALS" ac ON ac.vc_type = cia.vc_type '
+    'WHERE cia.institution_did = ri.institution_did) p ON true'
+)
+
+REQUEST_STATUS_SQL = {
+    'pending': 'cir.approved_date IS NULL AND cir.reject_date IS NULL',
+    'approved': 'cir.approved_date IS NOT NULL',
+    'rejected': 'cir.reject_date IS NOT NULL',
+}
+
+REQUEST_FIELDS = {
+    'request_id': 'cir.request_id',
+    'institution_did': 'cir.institution_did',
+    'vc_type': 'cir.vc_type',
+    'request_date': 'cir.request_date',
+    'reject_date': 'cir.reject_date',
+    'approved_date': 'cir.approved_date',
+    'status': ("CASE WHEN cir.approved_date IS NOT NULL THEN 'approved' "
+               "WHEN cir.reject_date IS NOT NULL THEN 'rejected' ELSE 'pending' END"),
+}
+
+
+def _select_list(columns: dict, fields, keys) -> str:
+    # ключевые поля выбираются всегда: по ним строится курсор следующей страницы
+    selected = list(fields) + [key for key in keys if key not in fields]
+    return ', '.join(f'{columns[field]} AS {field}' for field in selected)
+
+
+def _where(conditions) -> str:
+    return ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+
+
+def _as_int(value):
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        return None
+    return number if -2 ** 31 <= number < 2 ** 31 else None
 
 
 class Handler:
-    def __init__(self, admin_provider: AdminProvider, repo):
+    def __init__(self, admin_provider: AdminProvider, repo, permission_index: pi.PermissionIndex = None):
         self.admin_provider = admin_provider
         self.repo = repo
+        self.permission_index = permission_index
         self.active_connections = dict()
 
-    def handle_connection_webhook(self, message):
+    def handle_connection_webhook(self, message) -> bool:
         request = requests.ConnectionWebhookRequest.model_validate(message)
 
         logging.info(f"[Connection Webhook] State: {request.state}, Label: {request.label}, DID: {request.did}")
 
-        ok = False
+        # промежуточные состояния (invitation, active без DID и т.п.) — штатные, обрабатывать нечего
+        ok = True
 
         if request.state == 'request':
             logging.info(f"Got connection request from: {request.label}")
@@ -36,25 +111,19 @@ class Handler:
 
                 self.active_connections[request.did] = request.connection_id
 
-                ok = True
-
         elif request.state == 'completed':
             logging.info(f"Connection closed: {request.connection_id}")
 
-            self.active_connections.pop(request.did)
-
-            ok = True
+            self.active_connections.pop(request.did, None)
 
         elif request.state == 'abandoned' or request.state == 'error':
             logging.error(f"Connection error {request.connection_id}: {request.state}, {request.message}")
 
-            self.active_connections.pop(request.did)
+            self.active_connections.pop(request.did, None)
 
-            ok = True
-
-        return ok
+        return bool(ok)
 
-    def handle_basic_message_webhook(self, message):
+    def handle_basic_message_webhook(self, message) -> bool:
         request = requests.MessageWebhookRequest.model_validate(message)
 
         message_data = json.loads(request.content)
@@ -63,10 +132,11 @@ class Handler:
             message_type = message_data.get('type')
 
             if message_type == 'CREDENTIAL_ISSUANCE_REQUEST':
-                self.handle_credential_issuance_request(request.connection_id, message_data)
+                return self.handle_credential_issuance_request(request.connection_id, message_data)
 
             elif message_type == 'DID_REGISTRATION_REQUEST':
-                self.handle_credential_modification_request(request.connection_id, message_data)
+                _, ok = self.handle_credential_modification_request(message_data)
+                return ok
 
             # elif message_type == 'STATUS_UPDATE':
             #     logging.info(f"Получено обновление статуса: {message_data}")
@@ -74,19 +144,21 @@ class Handler:
             else:
                 logging.info(f"Получено структурированное сообщение: {message_data}")
 
-    def handle_credential_issuance_request(self, connection_id, message_data):
+        return True
+
+    def handle_credential_issuance_request(self, connection_id, message_data) -> bool:
         try:
             hospital_did = message_data.get('hospital_did')
             credential_type = message_data.get('credential_type')
 
             if not all([hospital_did, credential_type]):
                 logging.error(f"Неполные данные в запросе на выпуск VC: {message_data}")
-                return
+                return False
 
             sql = 'SELECT * FROM public."REGISTERED_INSTITUTIONS" WHERE institution_did=%s'
 
-            found_institution, ok = self.repo.execute_and_fetch(sql, hospital_did)
-            if not ok:
+            found_institution, ok = self.repo.execute_and_fetch_one(sql, (hospital_did,))
+            if not ok or not found_institution:
                 logging.error(f"Учреждение с DID {hospital_did} не найдено")
 
                 _ = self.admin_provider.send_message(
@@ -121,10 +193,10 @@ class Handler:
 
                 return False
 
-            logging.info(f"Получена заявка на выпуск VC через сообщение: {request_id} от {found_institution['name']}")
+            logging.info(f"Получена заявка на выпуск VC через сообщение: {request_id} от {found_institution['institution_name']}")
 
             # Отправляем подтверждение получения заявки
-            ok = self.admin_provider.send_message(
+            _, ok = self.admin_provider.send_message(
                 connection_id=connection_id,
                 request={
                     'type': 'CREDENTIAL_ISSUANCE_REQUEST_RECEIVED',
@@ -141,8 +213,9 @@ class Handler:
 
             return False
 
-    def handle_endorsement_webhook(self, message):
-        ok = False
+    def handle_endorsement_webhook(self, message) -> bool:
+        # остальные состояния транзакции — уведомления, действий не требуют
+        ok = True
 
         state = message.get('state')
         transaction_id = message.get('transaction_id')
@@ -152,7 +225,7 @@ class Handler:
         if state == 'request-received':
             ok = self.admin_provider.auto_endorse_transaction(transaction_id)
 
-        return ok
+        return bool(ok)
 
     def send_notification_to_hospital(self, hospital_did, notification_type, data):
         try:
@@ -161,11 +234,11 @@ class Handler:
             if not connection_id:
                 logging.warning(f"Нет активного соединения с больницей DID: {hospital_did}")
 
-                sql = f'SELECT * FROM public."REGISTERED_INSTITUTIONS" WHERE institution_did={hospital_did}'
+                sql = 'SELECT connection_id FROM public."REGISTERED_INSTITUTIONS" WHERE institution_did=%s'
 
-                found_institutions, _ = self.repo.execute_and_fetch(sql)
+                found_institution, _ = self.repo.execute_and_fetch_one(sql, (hospital_did,))
 
-                connection_id = found_institutions['connection_id']
+                connection_id = found_institution['connection_id'] if found_institution else None
 
                 if not connection_id:
                     logging.error(f"Не найдено соединение для больницы {hospital_did}")
@@ -185,55 +258,131 @@ class Handler:
                 logging.info(f"Уведомление отправлено больнице {hospital_did}: {notification_type}")
                 return True
             else:
-                logging.error(f"Ошибка отправки уведомления: {response.text}")
+                logging.error(f"Ошибка отправки уведомления: {response}")
                 return False
 
         except Exception as e:
             logging.error(f"Исключение при отправке уведомления: {e}")
             return False
 
-    def get_registered_institutions(self):
-        sql = ('SELECT * FROM public."REGISTERED_INSTITUTIONS" ri '
-               'LEFT JOIN public."CREDENTIAL_INSTITUTION_APPROVE" cia on cia.institution_did=ri.institution_did'
-               ' LEFT JOIN public."APPROVED_CREDENTIALS" ac on ac.vc_type=cia.vc_type')
-
-        institutions, ok = self.repo.execute_and_fetch(sql)
-        if ok:
-            return institutions, True
-
-        return None, False
-
-    def get_credential_issuance_requests(self):
-        sql = 'SELECT * FROM public."CREDENTIAL_ISSUANCE_REQUESTS"'
-
-        ci_requests, ok = self.repo.execute_and_fetch(sql)
-        if ok:
-            return ci_requests, True
+    def get_registered_institutions(self, limit=50, after=None, fields=None, vc_type=None, institution_type=None,
+                                    date_from=None, date_to=None):
+        """Страница учреждений по возрастанию institution_did (keyset).
+
+        after — institution_did последней строки предыдущей страницы; vc_type — только учреждения
+        с действующим разрешением на этот тип; date_from/date_to — по registration_date.
+        Возвращает ((items, next_after), ok); next_after=None — страница последняя.
+        """
+        fields = list(fields or INSTITUTION_FIELDS)
+        conditions, params = [], []
+
+        if after is not None:
+            conditions.append('ri.institution_did > %s')
+            params.append(after)
+        if vc_type is not None:
+            conditions.append('EXISTS (SELECT 1 FROM public."CREDENTIAL_INSTITUTION_APPROVE" f '
+                              'WHERE f.institution_did = ri.institution_did AND f.vc_type = %s AND f.date_approve IS NOT NULL)')
+            params.append(vc_type)
+        if institution_type:
+            conditions.append('ri.institution_type = %s')
+            params.append(institution_type)
+        if date_from:
+            conditions.append('ri.registration_date >= %s::date')
+            params.append(date_from)
+        if date_to:
+            conditions.append('ri.registration_date <= %s::date')
+            params.append(date_to)
+
+        sql = (f'SELECT {_select_list(INSTITUTION_FIELDS, fields, ("institution_did",))} '
+               f'FROM public."REGISTERED_INSTITUTIONS" ri{PERMISSIONS_LATERAL if "permissions" in fields else ""}'
+               f'{_where(conditions)} ORDER BY ri.institution_did LIMIT %s')
+        params.append(limit + 1)
+
+        rows, ok = self.repo.execute_and_fetch(sql, tuple(params))
+        if not ok:
+            return None, False
+
+        next_after = rows[limit - 1]['institution_did'] if len(rows) > limit else None
+        items = [{field: row[field] for field in fields} for row in rows[:limit]]
+        return (items, next_after), True
+
+    def get_credential_issuance_requests(self, limit=50, after=None, fields=None, status=None, vc_type=None,
+                                         institution_did=None, date_from=None, date_to=None):
+        """Страница заявок, новые первыми: ORDER BY request_date DESC, request_id DESC (keyset).
+
+        after — (request_date, request_id) последней строки предыдущей страницы;
+        status — pending / approved / rejected; date_from/date_to — по request_date.
+        Возвращает ((items, next_after), ok); next_after=None — страница последняя.
+        """
+        fields = list(fields or REQUEST_FIELDS)
+        conditions, params = [], []
+
+        if after is not None:
+            conditions.append('(cir.request_date, cir.request_id) < (%s::date, %s)')
+            params.extend(after)
+        if status:
+            conditions.append(REQUEST_STATUS_SQL[status])
+        if vc_type is not None:
+            conditions.append('cir.vc_type = %s')
+            params.append(vc_type)
+        if institution_did is not None:
+            conditions.append('cir.institution_did = %s')
+            params.append(institution_did)
+        if date_from:
+            conditions.append('cir.request_date >= %s::date')
+            params.append(date_from)
+        if date_to:
+            conditions.append('cir.request_date <= %s::date')
+            params.append(date_to)
+
+        sql = (f'SELECT {_select_list(REQUEST_FIELDS, fields, ("request_date", "request_id"))} '
+               f'FROM public."CREDENTIAL_ISSUANCE_REQUESTS" cir{_where(conditions)} '
+               'ORDER BY cir.request_date DESC, cir.request_id DESC LIMIT %s')
+        params.append(limit + 1)
+
+        rows, ok = self.repo.execute_and_fetch(sql, tuple(params))
+        if not ok:
+            return None, False
 
-        return None, False
+        next_after = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_after = (last['request_date'].isoformat(), last['request_id'])
+        items = [{field: row[field] for field in fields} for row in rows[:limit]]
+        return (items, next_after), True
 
     def credential_issuance_requests_approve(self, message, request_id):
-        sql = 'SELECT * FROM public."CREDENTIAL_ISSUANCE_REQUESTS" WHERE request_id=%s'
-
-        cir, ok = self.repo.execute_and_fetch(sql, request_id)
-        if not cir[0].get('institution_did'):
-            return {}, False
-
         date_approve = datetime.now().date().isoformat()
-        sql = f'UPDATE CREDENTIAL_ISSUANCE_REQUESTS SET approved_date=%s::date WHERE request_id=%s'
 
-        ok = self.repo.execute(sql, (date_approve, request_id))
-        if not ok:
-            return {}, False
+        # заявка и разрешение меняются одной транзакцией: либо обе записи, либо ни одной
+        try:
+            with self.repo.transaction() as tx:
+                cir = tx.execute_and_fetch_one(
+                    'SELECT institution_did, vc_type FROM public."CREDENTIAL_ISSUANCE_REQUESTS" WHERE request_id=%s FOR UPDATE',
+                    (request_id,)
+                )
+                if not cir or not cir.get('institution_did'):
+                    return {}, False
 
-        institution_did = cir[0].get('institution_did')
-        vc_type = cir[0].get('vc_type')
+                institution_did = cir.get('institution_did')
+                vc_type = cir.get('vc_type')
 
-        sql = 'INSERT INTO public."CREDENTIAL_INSTITUTION_APPROVE" (institution_did, vc_type, date_approve) VALUES (%s, %s, %s::date) ON CONFLICT DO NOTHING'
-        ok = self.repo.execute(sql, (institution_did, vc_type, date_approve))
-        if not ok:
+                tx.execute(
+                    'UPDATE public."CREDENTIAL_ISSUANCE_REQUESTS" SET approved_date=%s::date WHERE request_id=%s',
+                    (date_approve, request_id)
+                )
+                tx.execute(
+                    'INSERT INTO public."CREDENTIAL_INSTITUTION_APPROVE" (institution_did, vc_type, date_approve) '
+                    'VALUES (%s, %s, %s::date) ON CONFLICT DO NOTHING',
+                    (institution_did, vc_type, date_approve)
+                )
+        except Exception as e:
+            logging.error(f"Ошибка одобрения заявки {request_id}: {e}")
             return {}, False
 
+        if self.permission_index:
+            self.permission_index.grant(institution_did, vc_type)
+
         ok = self.send_notification_to_hospital(
             hospital_did=institution_did,
             notification_type='CREDENTIAL_ISSUANCE_APPROVED',
@@ -251,14 +400,14 @@ class Handler:
         }, True
 
     def credential_issuance_requests_reject(self, message, request_id):
-        sql = 'SELECT * FROM public."CREDENTIAL_ISSUANCE_REQUESTS" WHERE request_id=%s'
+        sql = 'SELECT institution_did, vc_type FROM public."CREDENTIAL_ISSUANCE_REQUESTS" WHERE request_id=%s'
 
-        cir, ok = self.repo.execute_and_fetch(sql, request_id)
-        if not cir.get('institution_did'):
+        cir, ok = self.repo.execute_and_fetch_one(sql, (request_id,))
+        if not ok or not cir or not cir.get('institution_did'):
             return {}, False
 
         reject_date = datetime.now().date().isoformat()
-        sql = 'UPDATE CREDENTIAL_ISSUANCE_REQUESTS SET reject_date=%s::date WHERE request_id=%s'
+        sql = 'UPDATE public."CREDENTIAL_ISSUANCE_REQUESTS" SET reject_date=%s::date WHERE request_id=%s'
 
         ok = self.repo.execute(sql, (reject_date, request_id))
         if not ok:
@@ -283,20 +432,62 @@ class Handler:
             'notification_sent': ok
         }, True
 
+    def institution_permission_suspend(self, message, institution_did, vc_type):
+        """Приостанавливает право учреждения на выпуск vc_type.
+
+        Возвращает (resp, ok); (None, False) — такого разрешения нет, ({}, False) — ошибка БД.
+        """
+        did, vc_type_id = _as_int(institution_did), _as_int(vc_type)
+        if did is None or vc_type_id is None:
+            return None, False
+
+        sql = 'DELETE FROM public."CREDENTIAL_INSTITUTION_APPROVE" WHERE institution_did=%s AND vc_type=%s'
+
+        deleted, ok = self.repo.execute_and_count(sql, (did, vc_type_id))
+        if not ok:
+            logging.error(f"Ошибка приостановки права {institution_did}/{vc_type}")
+            return {}, False
+
+        if not deleted:
+            logging.error(f"Не найдено разрешение {institution_did} на выпуск {vc_type}")
+            return None, False
+
+        if self.permission_index:
+            self.permission_index.revoke(institution_did, vc_type)
+
+        ok = self.send_notification_to_hospital(
+            hospital_did=institution_did,
+            notification_type='CREDENTIAL_ISSUANCE_SUSPENDED',
+            data={
+                'credential_type': vc_type,
+                'reason': (message or {}).get('reason'),
+            }
+        )
+
+        return {
+            'success': True,
+            'message': 'Право на выпуск приостановлено',
+            'institution_did': institution_did,
+            'credential_type': vc_type,
+            'notification_sent': ok
+        }, True
+
     def insert_sample(self):
         institution_did = [1, 2, 3, 4, 5]
         institution_type = ['Institution1', 'Institution2', 'Institution3', 'Institution4', 'Institution5']
         institution_name = ['InstitutionName1', 'InstitutionName2', 'InstitutionName3', 'InstitutionName4', 'InstitutionName5']
         registration_date = datetime.now().date().isoformat()
 
-        for i in range(0, len(institution_did)):
-            sql = 'INSERT INTO public."REGISTERED_INSTITUTIONS" (institution_did, institution_type, institution_name, registration_date) VALUES (%s, %s, %s, %s::date)'
-
-            params = (institution_did[i], institution_type[i], institution_name[i], registration_date)
+        sql = 'INSERT INTO public."REGISTERED_INSTITUTIONS" (institution_did, institution_type, institution_name, registration_date) VALUES (%s, %s, %s, %s::date)'
 
-            ok = self.repo.execute(sql, params)
-            if not ok:
-                return False
+        try:
+            with self.repo.transaction() as tx:
+                for i in range(0, len(institution_did)):
+                    params = (institution_did[i], institution_type[i], institution_name[i], registration_date)
+                    tx.execute(sql, params)
+        except Exception as e:
+            logging.error(f"Ошибка добавления тестовых учреждений: {e}")
+            return False
 
         return True
 
@@ -317,41 +508,101 @@ class Handler:
         return True
 
 
+    @staticmethod
+    def _permission_result(status, vc_type) -> dict:
+        if status == pi.NOT_REGISTERED:
+            return {'authorized': False, 'reason': PERMISSION_REASONS[status]}
+
+        return {
+            'authorized': status == pi.AUTHORIZED,
+            'vc_type': vc_type,
+            'reason': PERMISSION_REASONS[status],
+        }
+
+    def _permission_response(self, status, hospital_did, vc_type):
+        if status == pi.NOT_REGISTERED:
+            logging.error(f"Не найдена больница {hospital_did}")
+        elif status == pi.NOT_APPROVED:
+            logging.error(f"Не найден CREDENTIAL_INSTITUTION_APPROVE {hospital_did}")
+
+        return self._permission_result(status, vc_type), status == pi.AUTHORIZED
+
+    def _check_permissions_sql(self, pairs):
+        # institution_did и vc_type в схеме — integer; нечисловое значение не совпадёт ни с одной строкой
+        dids = [_as_int(did) for did, _ in pairs]
+        vc_types = [_as_int(vc_type) for _, vc_type in pairs]
+
+        rows, ok = self.repo.execute_and_fetch(CHECK_PERMISSIONS_SQL, (dids, vc_types))
+        if not ok:
+            return None, False
+
+        statuses = [pi.NOT_REGISTERED] * len(pairs)
+        for row in rows:
+            if row['registered']:
+                statuses[row['ord'] - 1] = pi.AUTHORIZED if row['approved'] else pi.NOT_APPROVED
+        return statuses, True
+
+    def verify_institution_permissions(self, checks):
+        """Пакетный verify_institution_permission: checks — [{hospital_did, credential_type}, ...].
+
+        Ответ по каждой паре в том же порядке; из индекса прав или одним SQL-запросом на всю пачку.
+        """
+        pairs = [(check.get('hospital_did'), check.get('credential_type')) for check in checks]
+
+        statuses = self.permission_index.check_many(pairs) if self.permission_index else None
+        if statuses is None:
+            statuses, ok = self._check_permissions_sql(pairs)
+            if not ok:
+                return {}, False
+
+        results = [
+            {'hospital_did': hospital_did, **self._permission_result(status, vc_type)}
+            for (hospital_did, vc_type), status in zip(pairs, statuses)
+        ]
+
+        return {
+            'authorized': all(result['authorized'] for result in results),
+            'results': results,
+        }, True
+
     def verify_institution_permission(self, message):
         hospital_did = message.get('hospital_did')
         vc_type = message.get('credential_type')
 
-        sql = 'SELECT * FROM public."REGISTERED_INSTITUTIONS" WHERE institution_did=%s'
+        if self.permission_index:
+            status = self.permission_index.check(hospital_did, vc_type)
+            if status is not None:
+                return self._permission_response(status, hospital_did, vc_type)
+
+        # индекс выключен или не синхронизирован с БД; колонки integer — как в _check_permissions_sql,
+        # нечисловой DID заведомо не зарегистрирован, а в запросе дал бы ошибку приведения
+        did = _as_int(hospital_did)
+        if did is None:
+            return self._permission_response(pi.NOT_REGISTERED, hospital_did, vc_type)
+
+        sql = 'SELECT institution_did FROM public."REGISTERED_INSTITUTIONS" WHERE institution_did=%s'
 
-        found_institutions, ok = self.repo.execute_and_fetch(sql, hospital_did)
+        found_institution, ok = self.repo.execute_and_fetch_one(sql, (did,))
         if not ok:
             return {}, False
 
-        connection_id = found_institutions.get('institution_did')
+        if not found_institution:
+            return self._permission_response(pi.NOT_REGISTERED, hospital_did, vc_type)
 
-        if not connection_id:
-            logging.error(f"Не найдена больница {hospital_did}")
-            return {
-                'authorized': False,
-                'reason': 'Учреждение не зарегистрировано'
-            }, False
+        vc = _as_int(vc_type)
+        if vc is None:
+            return self._permission_response(pi.NOT_APPROVED, hospital_did, vc_type)
 
-        sql = 'SELECT * FROM public."CREDENTIAL_INSTITUTION_APPROVE" cia WHERE institution_did=%s AND vc_type=%s AND date_approve NOT NULL'
+        sql = 'SELECT 1 FROM public."CREDENTIAL_INSTITUTION_APPROVE" cia WHERE institution_did=%s AND vc_type=%s AND date_approve IS NOT NULL LIMIT 1'
 
-        cir, ok = self.repo.execute_and_fetch(sql, (hospital_did, vc_type))
-        if len(cir) == 0 or not ok:
-            logging.error(f"Не найден CREDENTIAL_INSTITUTION_APPROVE {hospital_did}")
-            return {
-                'authorized': False,
-                'vc_type': vc_type,
-                'reason': 'Учреждение не имеет право выпускать данный тип документов',
-            }, False
+        cir, ok = self.repo.execute_and_fetch(sql, (did, vc))
+        if not ok:
+            return {}, False
 
-        return {
-            'authorized': True,
-            'vc_type': vc_type,
-            'reason': 'Учреждение имеет право выпускать данный тип документов',
-        }, True
+        if len(cir) == 0:
+            return self._permission_response(pi.NOT_APPROVED, hospital_did, vc_type)
+
+        return self._permission_response(pi.AUTHORIZED, hospital_did, vc_type)
 
     def handle_credential_modification_request(self, message):
         try:
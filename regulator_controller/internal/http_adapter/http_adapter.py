@@ -1,17 +1,74 @@
+import base64
+import binascii
 import json
 import logging
+from datetime import date
 
 from flask import jsonify, Flask, Response, request
 from regulator_controller.internal.domain.config import HttpAdapter as ConfigHttpAdapter
+from regulator_controller.internal.handlers import handlers
 from regulator_controller.internal.handlers.handlers import Handler
+from regulator_controller.internal.webhook_journal.webhook_journal import WebhookJournal
+from regulator_controller.pkg import metrics
+
+MAX_PERMISSION_CHECKS = 1000
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(after) -> str:
+    return base64.urlsafe_b64encode(json.dumps(after).encode()).decode()
+
+
+def decode_cursor(token: str):
+    return json.loads(base64.urlsafe_b64decode(token.encode()))
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def page_response(items, next_after) -> Response:
+    """{"items": [...], "next_cursor": str | null}, сериализуемый по одной записи, а не одной строкой на всю страницу."""
+    def generate():
+        yield '{"items": ['
+        for i, item in enumerate(items):
+            yield (', ' if i else '') + json.dumps(item, ensure_ascii=False, default=_json_default)
+        yield '], "next_cursor": ' + json.dumps(encode_cursor(next_after) if next_after is not None else None) + '}'
+
+    return Response(generate(), mimetype="application/json")
+
+
+def parse_list_args(args, allowed_fields):
+    """Общие параметры списков: limit, fields (через запятую), date_from, date_to. ValueError — некорректный запрос."""
+    limit = min(int(args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+
+    fields = None
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in allowed_fields]
+        if unknown or not fields:
+            raise ValueError(f"unknown fields: {', '.join(unknown)}")
+
+    # даты проверяются здесь, чтобы ошибка формата была 400, а не ошибкой запроса к БД
+    date_from = date.fromisoformat(args['date_from']).isoformat() if args.get('date_from') else None
+    date_to = date.fromisoformat(args['date_to']).isoformat() if args.get('date_to') else None
+
+    return {'limit': limit, 'fields': fields, 'date_from': date_from, 'date_to': date_to}
 
 class HttpAdapter(object):
     app = None
 
-    def __init__(self, name: str, handler: Handler, config: ConfigHttpAdapter):
+    def __init__(self, name: str, handler: Handler, config: ConfigHttpAdapter, journal: WebhookJournal = None):
         self.app = Flask(name)
         self.handler = handler
         self.config = config
+        self.journal = journal
         self.app.logger.setLevel(logging.INFO)
 
     def run(self):
@@ -29,6 +86,30 @@ class HttpAdapter(object):
         message = request.json
         logging.info(f"[Regulator Webhook] Topic: {topic}, Message: {json.dumps(message, indent=2)}")
 
+        entry_id = None
+        if self.journal:
+            entry_id = self.journal.append(topic, message)
+            if entry_id is None:
+                return jsonify({"status": "journal error"}), 503
+
+        try:
+            ok = self.process_webhook(topic, message)
+        except Exception:
+            if entry_id is not None:
+                self.journal.fail(entry_id)
+            raise
+
+        # обработка завершилась (в т.ч. отказом): повтор не исправит результат,
+        # а лишь повторит побочные эффекты — новую заявку, сообщения больнице
+        if entry_id is not None:
+            self.journal.complete(entry_id)
+
+        if not ok:
+            return jsonify({"status": "failed"}), 500
+
+        return jsonify({"status": "processed"}), 200
+
+    def process_webhook(self, topic, message):
         ok = False
 
         if topic == 'connections':
@@ -40,24 +121,49 @@ class HttpAdapter(object):
         elif topic == 'endorsements':
             ok = self.handler.handle_endorsement_webhook(message)
 
-        if not ok:
-            return jsonify({"status": "failed"}), 500
-
-        return jsonify({"status": "processed"}), 200
+        return ok
 
     def get_registered_institutions(self):
-        resp, ok = self.handler.get_registered_institutions()
+        """Параметры: limit, cursor, fields, vc_type, institution_type, date_from, date_to (registration_date)."""
+        args = request.args
+        try:
+            params = parse_list_args(args, handlers.INSTITUTION_FIELDS)
+            after = int(decode_cursor(args['cursor'])) if args.get('cursor') else None
+            vc_type = int(args['vc_type']) if args.get('vc_type') else None
+        except (ValueError, TypeError, binascii.Error) as e:
+            return jsonify({"error": f"bad request: {e}"}), 400
+
+        resp, ok = self.handler.get_registered_institutions(
+            after=after, vc_type=vc_type, institution_type=args.get('institution_type'), **params)
         if not ok:
             return jsonify({"status": "failed"}), 500
 
-        return jsonify(resp), 200
+        return page_response(*resp)
 
     def credential_issuance_requests(self):
-        resp, ok = self.handler.get_credential_issuance_requests()
+        """Параметры: limit, cursor, fields, status (pending/approved/rejected), vc_type, institution_did,
+        date_from, date_to (request_date)."""
+        args = request.args
+        try:
+            params = parse_list_args(args, handlers.REQUEST_FIELDS)
+            after = None
+            if args.get('cursor'):
+                request_date, request_id = decode_cursor(args['cursor'])
+                after = (date.fromisoformat(request_date).isoformat(), str(request_id))
+            status = args.get('status')
+            if status and status not in handlers.REQUEST_STATUS_SQL:
+                raise ValueError(f"unknown status: {status}")
+            vc_type = int(args['vc_type']) if args.get('vc_type') else None
+            institution_did = int(args['institution_did']) if args.get('institution_did') else None
+        except (ValueError, TypeError, binascii.Error) as e:
+            return jsonify({"error": f"bad request: {e}"}), 400
+
+        resp, ok = self.handler.get_credential_issuance_requests(
+            after=after, status=status, vc_type=vc_type, institution_did=institution_did, **params)
         if not ok:
             return jsonify({"status": "failed"}), 500
 
-        return jsonify(resp), 200
+        return page_response(*resp)
 
     def credential_issuance_requests_approve(self, request_id):
         message = request.json
@@ -77,8 +183,20 @@ class HttpAdapter(object):
 
         return jsonify(resp), 200
 
+    def institution_permission_suspend(self, institution_did, vc_type):
+        # тело необязательно: без него Flask 3 на request.json отвечает 415
+        message = request.get_json(silent=True) or {}
+
+        resp, ok = self.handler.institution_permission_suspend(message, institution_did, vc_type)
+        if resp is None:
+            return jsonify({"status": "not found"}), 404
+        if not ok:
+            return jsonify({"status": "failed"}), 500
+
+        return jsonify(resp), 200
+
     def verify_institution_permission(self):
-        message = request.json
+        message = request.get_json(silent=True) or {}
 
         resp, ok = self.handler.verify_institution_permission(message)
         if not ok:
@@ -86,6 +204,23 @@ class HttpAdapter(object):
 
         return jsonify(resp), 200
 
+    def verify_institution_permissions(self):
+        body = request.json or {}
+        checks = body.get('checks')
+        if not isinstance(checks, list) or not checks or not all(isinstance(check, dict) for check in checks):
+            return jsonify({"error": "checks(list of {hospital_did, credential_type}) is required"}), 400
+        if len(checks) > MAX_PERMISSION_CHECKS:
+            return jsonify({"error": f"at most {MAX_PERMISSION_CHECKS} checks per request"}), 400
+
+        resp, ok = self.handler.verify_institution_permissions(checks)
+        if not ok:
+            return jsonify({"status": "failed"}), 500
+
+        return jsonify(resp), 200
+
+    def metrics(self):
+        return Response(metrics.REGISTRY.render(), mimetype=metrics.CONTENT_TYPE)
+
 def get_routes(http_adapter: HttpAdapter):
     routes = \
         [
@@ -119,18 +254,40 @@ def get_routes(http_adapter: HttpAdapter):
                 "name": "credential-issuance-requests-reject",
                 "handler": http_adapter.credential_issuance_requests_reject
             },
+            {
+                "path": "/institutions/<institution_did>/permissions/<vc_type>/suspend",
+                "methods": ["POST"],
+                "name": "institution-permission-suspend",
+                "handler": http_adapter.institution_permission_suspend
+            },
             {
                 "path": "/verify-institution-permission",
                 "methods": ["POST"],
                 "name": "verify-institution-permission",
                 "handler": http_adapter.verify_institution_permission
             },
+            {
+                "path": "/verify-institution-permission/batch",
+                "methods": ["POST"],
+                "name": "verify-institution-permission-batch",
+                "handler": http_adapter.verify_institution_permissions
+            },
+            {
+                "path": "/metrics",
+                "methods": ["GET"],
+                "name": "metrics",
+                "handler": http_adapter.metrics
+            },
         ]
 
     return routes
 
-def run_http_adapter(name: str = "regulator", handler = None, config: ConfigHttpAdapter = None):
-    http_adapter = HttpAdapter(name, handler, config)
+def run_http_adapter(name: str = "regulator", handler = None, config: ConfigHttpAdapter = None, journal: WebhookJournal = None):
+    http_adapter = HttpAdapter(name, handler, config, journal)
+
+    # вебхуки, не обработанные до остановки/падения контроллера
+    if journal:
+        journal.replay(http_adapter.process_webhook)
 
     routes = get_routes(http_adapter)
 
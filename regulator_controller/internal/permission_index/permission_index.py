@@ -0,0 +1,240 @@
+import logging
+import select
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from regulator_controller.internal.domain.config import PermissionIndex as ConfigPermissionIndex
+from regulator_controller.pkg.metrics import REGISTRY
+from regulator_controller.pkg.ttl_cache import TTLCache
+
+# Канал и payload задаются триггерами миграции 0003_permission_notify.sql
+NOTIFY_CHANNEL = "regulator_permissions"
+RELOAD_ALL = "*"
+
+# Результаты PermissionIndex.check
+AUTHORIZED = "authorized"
+NOT_APPROVED = "not_approved"
+NOT_REGISTERED = "not_registered"
+
+PERMISSION_CHECKS = REGISTRY.counter(
+    "permission_checks_total", "Institution permission checks by source (index, negative_cache, db, fallback)", ["source"])
+
+LOAD_SQL = ('SELECT ri.institution_did, cia.vc_type FROM public."REGISTERED_INSTITUTIONS" ri '
+            'LEFT JOIN public."CREDENTIAL_INSTITUTION_APPROVE" cia '
+            'ON cia.institution_did = ri.institution_did AND cia.date_approve IS NOT NULL')
+INSTITUTIONS_SQL = LOAD_SQL + ' WHERE ri.institution_did = ANY(%s::integer[])'
+
+
+def _key(value) -> str:
+    # DID и vc_type приходят от больниц и строкой, и числом; числовые приводим так же, как
+    # Postgres при сравнении с integer-колонкой ("01" == 1), иначе индекс и SQL-путь расходятся
+    key = str(value).strip()
+    try:
+        return str(int(key))
+    except ValueError:
+        return key
+
+
+def _is_db_did(did: str) -> bool:
+    # institution_did в схеме — integer: другой DID заведомо не зарегистрирован, а в запросе дал бы ошибку приведения
+    return did.isdigit() and int(did) < 2 ** 31
+
+
+def _group(rows) -> Dict[str, FrozenSet[str]]:
+    grouped = {}
+    for row in rows:
+        types = grouped.setdefault(_key(row['institution_did']), set())
+        if row['vc_type'] is not None:
+            types.add(_key(row['vc_type']))
+    return {did: frozenset(types) for did, types in grouped.items()}
+
+
+class PermissionIndex:
+    """Права учреждений в памяти процесса: institution_did -> frozenset(vc_type).
+
+    Загружается целиком при старте; зарегистрированное учреждение без одобрений хранится
+    с пустым множеством, поэтому и положительный, и отрицательный ответ по известному DID
+    даются без запросов к БД. Неизвестный DID один раз проверяется в БД, и отрицательный
+    результат запоминается в ограниченном TTLCache (NegativeCacheSize, NegativeCacheTTL).
+
+    Читатели не берут блокировок: записи только заменяют frozenset по ключу или весь словарь.
+
+    Изменения из других процессов приходят через Postgres LISTEN/NOTIFY: фоновый поток
+    перечитывает права учреждения из payload. После (пере)подключения индекс загружается
+    заново — уведомления за время обрыва потеряны. Пока слушатель не подключён, check()
+    возвращает None, и вызывающий идёт в БД напрямую.
+    """
+
+    def __init__(self, repo, config: ConfigPermissionIndex):
+        self.repo = repo
+        self.config = config
+        self._permissions: Dict[str, FrozenSet[str]] = {}
+        self._negative = TTLCache(max_size=config.NegativeCacheSize, ttl=config.NegativeCacheTTL)
+        self._write_lock = threading.Lock()
+        self._listening = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        REGISTRY.gauge_callback("permission_index_institutions", "Institutions in the in-memory permission index", [],
+                                lambda: [((), len(self._permissions))])
+        REGISTRY.gauge_callback("permission_index_listening", "1 if the permission index receives NOTIFY updates", [],
+                                lambda: [((), int(self.listening))])
+
+    @property
+    def listening(self) -> bool:
+        return self._listening.is_set()
+
+    def start(self, wait: Optional[float] = None):
+        """Запускает поток слушателя; ждёт первой загрузки не дольше wait секунд (по умолчанию ReconnectInterval)."""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._listen, name="permission-index-listener", daemon=True)
+        self._thread.start()
+        self._listening.wait(self.config.ReconnectInterval if wait is None else wait)
+
+    def stop(self):
+        self._stopped.set()
+
+    def check(self, institution_did, vc_type) -> Optional[str]:
+        """AUTHORIZED / NOT_APPROVED / NOT_REGISTERED; None — индекс недоступен, нужно спросить БД."""
+        if not self.listening:
+            PERMISSION_CHECKS.inc("fallback")
+            return None
+
+        did = _key(institution_did)
+        types = self._permissions.get(did)
+        if types is not None:
+            PERMISSION_CHECKS.inc("index")
+            return AUTHORIZED if _key(vc_type) in types else NOT_APPROVED
+
+        if did in self._negative:
+            PERMISSION_CHECKS.inc("negative_cache")
+            return NOT_REGISTERED
+
+        types, ok = self.refresh(did)
+        if not ok:
+            return None
+
+        PERMISSION_CHECKS.inc("db")
+        if types is None:
+            return NOT_REGISTERED
+        return AUTHORIZED if _key(vc_type) in types else NOT_APPROVED
+
+    def check_many(self, pairs: Sequence[Tuple]) -> Optional[List[str]]:
+        """check() для списка пар (institution_did, vc_type) в том же порядке.
+
+        Все DID, которых нет ни в индексе, ни в отрицательном кэше, проверяются одним запросом.
+        """
+        if not self.listening:
+            PERMISSION_CHECKS.inc("fallback", amount=len(pairs))
+            return None
+
+        keys = [(_key(did), _key(vc_type)) for did, vc_type in pairs]
+        unknown = {did for did, _ in keys if did not in self._permissions and did not in self._negative}
+        if unknown and not self.refresh_many(unknown):
+            return None
+
+        permissions = self._permissions
+        statuses = []
+        for did, vc_type in keys:
+            types = permissions.get(did)
+            if did in unknown:
+                PERMISSION_CHECKS.inc("db")
+            else:
+                PERMISSION_CHECKS.inc("negative_cache" if types is None else "index")
+
+            if types is None:
+                statuses.append(NOT_REGISTERED)
+            else:
+                statuses.append(AUTHORIZED if vc_type in types else NOT_APPROVED)
+        return statuses
+
+    def load(self) -> bool:
+        rows, ok = self.repo.execute_and_fetch(LOAD_SQL)
+        if not ok:
+            return False
+
+        permissions = _group(rows)
+        with self._write_lock:
+            self._permissions = permissions
+            self._negative.clear()
+
+        logging.info(f"Permission index loaded: {len(permissions)} institutions")
+        return True
+
+    def refresh(self, institution_did) -> Tuple[Optional[FrozenSet[str]], bool]:
+        """Перечитывает права одного учреждения. Возвращает (типы или None, если не зарегистрировано; ok)."""
+        did = _key(institution_did)
+        if not self.refresh_many([did]):
+            return None, False
+        return self._permissions.get(did), True
+
+    def refresh_many(self, institution_dids: Iterable) -> bool:
+        """Перечитывает права учреждений одним запросом; незарегистрированные попадают в отрицательный кэш."""
+        dids = {_key(did) for did in institution_dids}
+        with self._write_lock:
+            db_dids = [did for did in dids if _is_db_did(did)]
+            found = {}
+            if db_dids:
+                rows, ok = self.repo.execute_and_fetch(INSTITUTIONS_SQL, (db_dids,))
+                if not ok:
+                    return False
+                found = _group(rows)
+
+            for did in dids:
+                types = found.get(did)
+                if types is None:
+                    self._permissions.pop(did, None)
+                    self._negative.set(did, True)
+                else:
+                    self._permissions[did] = types
+                    self._negative.delete(did)
+            return True
+
+    def grant(self, institution_did, vc_type):
+        """Применяет одобрение, закоммиченное этим процессом, не дожидаясь NOTIFY."""
+        did = _key(institution_did)
+        with self._write_lock:
+            self._permissions[did] = self._permissions.get(did, frozenset()) | {_key(vc_type)}
+            self._negative.delete(did)
+
+    def revoke(self, institution_did, vc_type):
+        did = _key(institution_did)
+        with self._write_lock:
+            types = self._permissions.get(did)
+            if types is not None:
+                self._permissions[did] = types - {_key(vc_type)}
+
+    def _apply(self, payload: str):
+        ok = self.load() if payload == RELOAD_ALL else self.refresh(payload)[1]
+        if not ok:
+            # без этого обновления индекс устарел: переподключение перезагрузит его целиком
+            raise RuntimeError(f"permission index update failed for {payload!r}")
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = self.repo.listen_connection()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+                # LISTEN до загрузки: изменение между ними придёт уведомлением, а не потеряется
+                if not self.load():
+                    raise RuntimeError("permission index load failed")
+                self._listening.set()
+
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._apply(conn.notifies.pop(0).payload)
+
+            except Exception as e:
+                logging.warning(f"Permission index listener error: {e!r}")
+            finally:
+                self._listening.clear()
+                if conn is not None:
+                    conn.close()
+
+            self._stopped.wait(self.config.ReconnectInterval)
@@ -0,0 +1,46 @@
+-- Индексы под запросы обработчиков регулятора
+
+-- Одно действующее разрешение на пару (учреждение, тип документа). Повторные одобрения —
+-- история, миграция их не удаляет: при конфликтах она прерывается со списком пар,
+-- которые нужно разобрать вручную до повторного запуска.
+DO $$
+DECLARE
+    conflicts text;
+BEGIN
+    SELECT string_agg(format('(%s, %s): %s', institution_did, vc_type, approvals), '; ')
+    INTO conflicts
+    FROM (
+        SELECT institution_did, vc_type, count(*) AS approvals
+        FROM public."CREDENTIAL_INSTITUTION_APPROVE"
+        WHERE date_approve IS NOT NULL
+        GROUP BY institution_did, vc_type
+        HAVING count(*) > 1
+        ORDER BY institution_did, vc_type
+    ) duplicated;
+
+    IF conflicts IS NOT NULL THEN
+        RAISE EXCEPTION 'CREDENTIAL_INSTITUTION_APPROVE has several approvals per (institution_did, vc_type): %', conflicts
+            USING HINT = 'Resolve the duplicated approvals manually, then restart the controller to apply migration 0002.';
+    END IF;
+END
+$$;
+
+-- verify_institution_permission: index-only поиск по (institution_did, vc_type)
+CREATE UNIQUE INDEX IF NOT EXISTS "CREDENTIAL_INSTITUTION_APPROVE_active_uq"
+    ON public."CREDENTIAL_INSTITUTION_APPROVE" (institution_did, vc_type)
+    WHERE date_approve IS NOT NULL;
+
+-- JOIN с APPROVED_CREDENTIALS в get_registered_institutions
+CREATE INDEX IF NOT EXISTS "CREDENTIAL_INSTITUTION_APPROVE_vc_type_idx"
+    ON public."CREDENTIAL_INSTITUTION_APPROVE" (vc_type);
+
+-- send_notification_to_hospital читает только connection_id по institution_did
+CREATE INDEX IF NOT EXISTS "REGISTERED_INSTITUTIONS_did_connection_idx"
+    ON public."REGISTERED_INSTITUTIONS" (institution_did) INCLUDE (connection_id);
+
+-- Заявки учреждения и FK на APPROVED_CREDENTIALS
+CREATE INDEX IF NOT EXISTS "CREDENTIAL_ISSUANCE_REQUESTS_institution_did_idx"
+    ON public."CREDENTIAL_ISSUANCE_REQUESTS" (institution_did);
+
+CREATE INDEX IF NOT EXISTS "CREDENTIAL_ISSUANCE_REQUESTS_vc_type_idx"
+    ON public."CREDENTIAL_ISSUANCE_REQUESTS" (vc_type);
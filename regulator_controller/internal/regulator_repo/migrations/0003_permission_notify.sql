@@ -0,0 +1,40 @@
+-- Уведомления об изменении прав учреждений для in-memory индекса (permission_index).
+-- Payload — DID затронутого учреждения; слушатель перечитывает права только этого учреждения,
+-- '*' (TRUNCATE) — полная перезагрузка индекса.
+-- NOTIFY доставляется после commit, одинаковые payload в одной транзакции схлопываются.
+
+CREATE OR REPLACE FUNCTION public.notify_permission_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('regulator_permissions', '*');
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('regulator_permissions', OLD.institution_did::text);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM pg_notify('regulator_permissions', NEW.institution_did::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS "REGISTERED_INSTITUTIONS_notify_permission" ON public."REGISTERED_INSTITUTIONS";
+CREATE TRIGGER "REGISTERED_INSTITUTIONS_notify_permission"
+    AFTER INSERT OR UPDATE OF institution_did OR DELETE ON public."REGISTERED_INSTITUTIONS"
+    FOR EACH ROW EXECUTE FUNCTION public.notify_permission_change();
+
+DROP TRIGGER IF EXISTS "CREDENTIAL_INSTITUTION_APPROVE_notify_permission" ON public."CREDENTIAL_INSTITUTION_APPROVE";
+CREATE TRIGGER "CREDENTIAL_INSTITUTION_APPROVE_notify_permission"
+    AFTER INSERT OR UPDATE OR DELETE ON public."CREDENTIAL_INSTITUTION_APPROVE"
+    FOR EACH ROW EXECUTE FUNCTION public.notify_permission_change();
+
+DROP TRIGGER IF EXISTS "REGISTERED_INSTITUTIONS_notify_truncate" ON public."REGISTERED_INSTITUTIONS";
+CREATE TRIGGER "REGISTERED_INSTITUTIONS_notify_truncate"
+    AFTER TRUNCATE ON public."REGISTERED_INSTITUTIONS"
+    FOR EACH STATEMENT EXECUTE FUNCTION public.notify_permission_change();
+
+DROP TRIGGER IF EXISTS "CREDENTIAL_INSTITUTION_APPROVE_notify_truncate" ON public."CREDENTIAL_INSTITUTION_APPROVE";
+CREATE TRIGGER "CREDENTIAL_INSTITUTION_APPROVE_notify_truncate"
+    AFTER TRUNCATE ON public."CREDENTIAL_INSTITUTION_APPROVE"
+    FOR EACH STATEMENT EXECUTE FUNCTION public.notify_permission_change();
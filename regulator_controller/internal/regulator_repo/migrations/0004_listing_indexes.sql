@@ -0,0 +1,19 @@
+-- Keyset-пагинация заявок: ORDER BY request_date DESC, request_id DESC (обратный проход по индексу)
+
+CREATE INDEX IF NOT EXISTS "CREDENTIAL_ISSUANCE_REQUESTS_date_id_idx"
+    ON public."CREDENTIAL_ISSUANCE_REQUESTS" (request_date, request_id);
+
+-- Основной экран дашборда — заявки на рассмотрении
+CREATE INDEX IF NOT EXISTS "CREDENTIAL_ISSUANCE_REQUESTS_pending_idx"
+    ON public."CREDENTIAL_ISSUANCE_REQUESTS" (request_date, request_id)
+    WHERE approved_date IS NULL AND reject_date IS NULL;
+
+-- Фильтры по учреждению и типу документа с тем же порядком; заменяют одноколоночные индексы из 0002
+-- (ведущая колонка по-прежнему покрывает FK)
+DROP INDEX IF EXISTS public."CREDENTIAL_ISSUANCE_REQUESTS_institution_did_idx";
+CREATE INDEX IF NOT EXISTS "CREDENTIAL_ISSUANCE_REQUESTS_institution_date_idx"
+    ON public."CREDENTIAL_ISSUANCE_REQUESTS" (institution_did, request_date, request_id);
+
+DROP INDEX IF EXISTS public."CREDENTIAL_ISSUANCE_REQUESTS_vc_type_idx";
+CREATE INDEX IF NOT EXISTS "CREDENTIAL_ISSUANCE_REQUESTS_vc_type_date_idx"
+    ON public."CREDENTIAL_ISSUANCE_REQUESTS" (vc_type, request_date, request_id);
@@ -0,0 +1,56 @@
+import logging
+import os
+import re
+from typing import List, Tuple
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Ключ advisory lock: несколько процессов контроллера, стартующих одновременно, применяют миграции по очереди
+MIGRATIONS_LOCK_KEY = 7_302_001
+
+MIGRATION_FILE = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+
+def list_migrations(directory: str = MIGRATIONS_DIR) -> List[Tuple[int, str, str]]:
+    """Файлы NNNN_name.sql из directory по возрастанию номера: [(version, name, path), ...]."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def run_migrations(repo, directory: str = MIGRATIONS_DIR) -> List[int]:
+    """Применяет ещё не применённые миграции; каждая — в своей транзакции вместе с записью в SCHEMA_MIGRATIONS.
+
+    Возвращает список применённых в этом запуске версий.
+    """
+    applied_now = []
+    for version, name, path in list_migrations(directory):
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+
+        with repo.transaction() as tx:
+            tx.execute('SELECT pg_advisory_xact_lock(%s)', (MIGRATIONS_LOCK_KEY,))
+            tx.execute('''
+            CREATE TABLE IF NOT EXISTS public."SCHEMA_MIGRATIONS" (
+                version integer PRIMARY KEY,
+                name character varying NOT NULL,
+                applied_at timestamptz NOT NULL DEFAULT now()
+            )
+            ''')
+            if tx.execute_and_fetch_one('SELECT 1 FROM public."SCHEMA_MIGRATIONS" WHERE version=%s', (version,)):
+                continue
+
+            logging.info(f"Applying migration {version:04d}_{name}")
+            tx.execute(sql)
+            tx.execute('INSERT INTO public."SCHEMA_MIGRATIONS" (version, name) VALUES (%s, %s)', (version, name))
+            applied_now.append(version)
+
+    return applied_now
@@ -1,48 +1,205 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
 import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+
 from regulator_controller.internal.domain.config import RegulatorRepo as ConfigRegulatorRepo
+from regulator_controller.internal.regulator_repo.migrator import run_migrations
+
+# Ошибки, после которых соединение считается потерянным (рестарт Postgres, обрыв сети)
+RECONNECT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Соединение пула: по умолчанию autocommit, чтобы одиночные SELECT не открывали транзакцию."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.autocommit = True
+
+
+class UnitOfWork:
+    """Курсор одной транзакции RegulatorRepo.transaction(): методы как у репозитория, но без commit."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, sql: str, params: Optional[tuple] = None) -> int:
+        self.cursor.execute(sql, params)
+        return self.cursor.rowcount
+
+    def execute_and_fetch(self, sql: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        self.cursor.execute(sql, params)
+        return [dict(row) for row in self.cursor.fetchall()]
+
+    def execute_and_fetch_one(self, sql: str, params: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
+        self.cursor.execute(sql, params)
+        row = self.cursor.fetchone()
+        return dict(row) if row else None
 
 
 class RegulatorRepo:
+    """PostgreSQL репозиторий регулятора.
+
+    - ThreadedConnectionPool (MinConnections..MaxConnections): каждый вызов берёт своё
+      соединение и курсор, потоки Flask и обработчики вебхуков не делят один курсор.
+      Если свободных соединений нет, вызов ждёт, а не падает с PoolError.
+    - Соединения в autocommit: чтение не делает commit, одиночная запись фиксируется сразу.
+    - Несколько записей, которые должны примениться вместе, выполняются в transaction():
+      одна транзакция и один commit, при исключении — rollback.
+    - Схема ведётся версионированными миграциями (SCHEMA_MIGRATIONS), применяются при старте,
+      если Migrate включён.
+    - При потере соединения (рестарт Postgres) оно выбрасывается из пула, а одиночный
+      запрос один раз повторяется на новом соединении. Прочие OperationalError
+      (deadlock, отмена запроса) не повторяются: запрос мог уже выполниться.
+    """
+
     def __init__(self, config: ConfigRegulatorRepo):
         self.config = config
-        self.connection = None
-        self.cursor = None
+        self.pool = None
+        self._slots = threading.BoundedSemaphore(config.MaxConnections)
 
         self.connect()
 
+        if config.Migrate:
+            self.migrate()
+
     def connect(self):
-        self.connection = psycopg2.connect(
+        self.pool = psycopg2.pool.ThreadedConnectionPool(
+            self.config.MinConnections,
+            self.config.MaxConnections,
             host=self.config.Host,
             port=self.config.Port,
             database=self.config.Name,
             user=self.config.User,
             password=self.config.Password,
+            connection_factory=PooledConnection,
         )
-        if self.connection:
-            self.cursor = self.connection.cursor()
+
+    def listen_connection(self) -> psycopg2.extensions.connection:
+        """Отдельное (не из пула) autocommit-соединение для LISTEN: оно занято слушателем постоянно."""
+        conn = psycopg2.connect(
+            host=self.config.Host,
+            port=self.config.Port,
+            database=self.config.Name,
+            user=self.config.User,
+            password=self.config.Password,
+            # без трафика оборванное соединение иначе не обнаружить: select ждал бы вечно
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3,
+        )
+        conn.autocommit = True
+        return conn
+
+    def migrate(self) -> list:
+        """Применяет SQL-миграции из regulator_repo/migrations (см. migrator.run_migrations)."""
+        applied = run_migrations(self)
+        if applied:
+            logging.info(f"DB migrations applied: {applied}")
+        return applied
 
     def close_connection(self):
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
+        if self.pool:
+            self.pool.closeall()
 
-    def execute_and_fetch(self, sql, params=None):
-        if self.connection:
-            self.cursor.execute(sql, params)
-            self.connection.commit()
-            result = self.cursor.fetchall()
+    def _run(self, fn: Callable[[PooledConnection, Any], Any]) -> Any:
+        """Выполняет fn(conn, cursor) на соединении из пула; при обрыве соединения — один повтор."""
+        with self._slots:
+            for attempt in range(2):
+                conn = self.pool.getconn()
+                try:
+                    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                        result = fn(conn, cursor)
+                except RECONNECT_ERRORS as e:
+                    # проверяем до putconn: с close=True он сам закрыл бы соединение
+                    lost = bool(conn.closed)
+                    self.pool.putconn(conn, close=lost)
+                    if attempt or not lost:
+                        raise
+                    logging.warning(f"DB connection lost, reconnecting: {e}")
+                    continue
+                except Exception:
+                    self.pool.putconn(conn)
+                    raise
 
-            columns = [col[0] for col in self.cursor.description]
-            return [dict(zip(columns, row)) for row in result], True
+                self.pool.putconn(conn)
+                return result
 
-        return None, False
+    @contextmanager
+    def transaction(self):
+        """Unit of work: все запросы внутри блока — одна транзакция на одном соединении пула.
 
-    def execute(self, sql, params):
-        if self.connection:
-            self.cursor.execute(sql, params)
-            self.connection.commit()
+        with repo.transaction() as tx:
+            row = tx.execute_and_fetch_one('SELECT ... FOR UPDATE', (...,))
+            tx.execute('UPDATE ...', (...,))
+        Выход из блока — commit, исключение — rollback и проброс исключения.
+        """
+        with self._slots:
+            conn = self.pool.getconn()
+            broken = False
+            try:
+                conn.autocommit = False
+                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                    yield UnitOfWork(cursor)
+                conn.commit()
+            except BaseException:
+                try:
+                    conn.rollback()
+                except RECONNECT_ERRORS:
+                    broken = True
+                raise
+            finally:
+                broken = broken or bool(conn.closed)
+                if not broken:
+                    conn.autocommit = True
+                self.pool.putconn(conn, close=broken)
 
-            return True
+    def execute_and_fetch(self, sql: str, params: Optional[tuple] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        def fn(conn, cursor):
+            cursor.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+        try:
+            return self._run(fn), True
+        except Exception as e:
+            logging.error(f"DB execute_and_fetch error: {e}")
+            return [], False
+
+    def execute_and_fetch_one(self, sql: str, params: Optional[tuple] = None) -> Tuple[Optional[Dict[str, Any]], bool]:
+        def fn(conn, cursor):
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+        try:
+            result = self._run(fn)
+            return (dict(result) if result else None), True
+        except Exception as e:
+            logging.error(f"DB execute_and_fetch_one error: {e}")
+            return None, False
 
-        return False
+    def execute_and_count(self, sql: str, params: Optional[tuple] = None) -> Tuple[int, bool]:
+        """Как execute, но возвращает (число затронутых строк, ok)."""
+        def fn(conn, cursor):
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+        try:
+            return self._run(fn), True
+        except Exception as e:
+            logging.error(f"DB execute error: {e}")
+            return 0, False
+
+    def execute(self, sql: str, params: Optional[tuple] = None) -> bool:
+        try:
+            self._run(lambda conn, cursor: cursor.execute(sql, params))
+            return True
+        except Exception as e:
+            logging.error(f"DB execute error: {e}")
+            return False
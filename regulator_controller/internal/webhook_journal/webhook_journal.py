@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from regulator_controller.internal.domain.config import WebhookJournal as ConfigWebhookJournal
+
+
+class WebhookJournal:
+    """Журнал входящих вебхуков на SQLite (WAL).
+
+    Каждый вебхук записывается до обработки и помечается выполненным, как только обработчик
+    вернул управление — независимо от результата: отказ по существу повтором не исправить,
+    а побочные эффекты обработчиков не идемпотентны. При старте (replay) повторно обрабатываются
+    только незавершённые записи: прерванные остановкой/падением процесса или исключением
+    (последние — не более MaxAttempts раз).
+
+    Запись — с групповым коммитом: append() добавляет строку в открытую транзакцию
+    и ждёт, пока фоновый поток закоммитит накопленную пачку (раз в FlushIntervalMs).
+    Так при synchronous=FULL на пачку приходится один fsync, а не по одному на вебхук.
+    Отметки complete/fail попадают в ту же пачку, но ожидания не требуют:
+    потерянная отметка приводит лишь к повторной обработке.
+    """
+
+    def __init__(self, config: ConfigWebhookJournal):
+        self.config = config
+        self.path = config.Path
+        self.flush_interval = config.FlushIntervalMs / 1000.0
+
+        self._cond = threading.Condition(threading.Lock())
+        self._pid: Optional[int] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._in_tx = False
+        self._batch = 0
+        self._committed = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _ensure_open(self):
+        """Открывает соединение и поток сброса в текущем процессе (после fork — заново)."""
+        if self._pid == os.getpid():
+            return
+
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS webhooks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            received_at REAL NOT NULL,
+            done_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0
+        )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_webhooks_pending ON webhooks(id) WHERE done_at IS NULL')
+
+        self._conn = conn
+        self._in_tx = False
+        self._batch = 0
+        self._committed = 0
+        self._pid = os.getpid()
+        threading.Thread(target=self._flusher, name="webhook-journal-flusher", daemon=True).start()
+
+    def _write(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        # вызывается под self._cond
+        if not self._in_tx:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._in_tx = True
+            self._cond.notify_all()
+        return self._conn.execute(sql, params)
+
+    def _flusher(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            with self._cond:
+                while not self._in_tx:
+                    self._cond.wait()
+
+            # даём пачке накопиться
+            time.sleep(self.flush_interval)
+
+            with self._cond:
+                self._commit()
+
+    def _commit(self):
+        # вызывается под self._cond
+        if not self._in_tx:
+            return
+        try:
+            self._conn.execute("COMMIT")
+            self._committed = self._batch + 1
+        except sqlite3.Error as e:
+            # записи пачки не сохранены: ожидающие append() получат None
+            logging.error(f"[Webhook Journal] commit error: {e}")
+            try:
+                self._conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+        self._batch += 1
+        self._in_tx = False
+        self._cond.notify_all()
+
+    # --- API ---
+    def append(self, topic: str, message: dict) -> Optional[int]:
+        """Записывает вебхук и возвращает id записи после того, как пачка закоммичена (None — ошибка записи)."""
+        with self._cond:
+            self._ensure_open()
+            try:
+                entry_id = self._write(
+                    'INSERT INTO webhooks (topic, payload, received_at) VALUES (?, ?, ?)',
+                    (topic, json.dumps(message, ensure_ascii=False), time.time()),
+                ).lastrowid
+            except sqlite3.Error as e:
+                logging.error(f"[Webhook Journal] append error: {e}")
+                return None
+
+            batch = self._batch
+            while self._committed <= batch and self._batch == batch:
+                self._cond.wait()
+
+            return entry_id if self._committed > batch else None
+
+    def complete(self, entry_id: int):
+        self._mark('UPDATE webhooks SET done_at=?, attempts=attempts+1 WHERE id=?', (time.time(), entry_id))
+
+    def fail(self, entry_id: int):
+        self._mark('UPDATE webhooks SET attempts=attempts+1 WHERE id=?', (entry_id,))
+
+    def discard(self, entry_id: int):
+        """Удаляет запись, которую отправитель доставит повторно (например, при ответе 503)."""
+        self._mark('DELETE FROM webhooks WHERE id=?', (entry_id,))
+
+    def _mark(self, sql: str, params: tuple):
+        with self._cond:
+            self._ensure_open()
+            try:
+                self._write(sql, params)
+            except sqlite3.Error as e:
+                logging.error(f"[Webhook Journal] update error: {e}")
+
+    def flush(self):
+        """Немедленно коммитит текущую пачку."""
+        with self._cond:
+            if self._pid == os.getpid():
+                self._commit()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            self._ensure_open()
+            rows = self._conn.execute(
+                'SELECT id, topic, payload, attempts FROM webhooks WHERE done_at IS NULL AND attempts < ? ORDER BY id',
+                (self.config.MaxAttempts,),
+            ).fetchall()
+        return [{"id": r[0], "topic": r[1], "message": json.loads(r[2]), "attempts": r[3]} for r in rows]
+
+    def replay(self, process: Callable[[str, dict], bool]) -> int:
+        """Синхронно обрабатывает незавершённые записи (вызывать при старте, до приёма вебхуков)."""
+        entries = self.pending()
+        if entries:
+            logging.info(f"[Webhook Journal] replaying {len(entries)} webhooks")
+
+        for entry in entries:
+            try:
+                if not process(entry["topic"], entry["message"]):
+                    logging.warning(f"[Webhook Journal] replay of {entry['id']} ({entry['topic']}) was rejected")
+            except Exception as e:
+                logging.exception(f"[Webhook Journal] replay of {entry['id']} raised: {e}")
+                self.fail(entry["id"])
+                continue
+
+            self.complete(entry["id"])
+
+        self.purge()
+        self.flush()
+        return len(entries)
+
+    def purge(self):
+        """Удаляет выполненные записи старше RetentionHours."""
+        self._mark('DELETE FROM webhooks WHERE done_at IS NOT NULL AND done_at < ?',
+                   (time.time() - self.config.RetentionHours * 3600,))
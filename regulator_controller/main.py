@@ -2,8 +2,10 @@ from pkg import config_parse
 from internal.domain import config as cfg
 from internal.admin_provider.admin_provider import AdminProvider
 from internal.handlers.handlers import Handler
+from internal.permission_index.permission_index import PermissionIndex
 from internal.regulator_repo.repo import RegulatorRepo
 from internal.http_adapter.http_adapter import run_http_adapter
+from internal.webhook_journal.webhook_journal import WebhookJournal
 
 import logging
 
@@ -13,7 +15,11 @@ config = config_parse.get_config(config)
 admin_provider = AdminProvider(config.Adapters.Secondary.AdminProvider)
 regulator_repo = RegulatorRepo(config.Adapters.Secondary.RegulatorRepo)
 
-handler = Handler(admin_provider, regulator_repo)
+permission_index = None
+if config.Adapters.Secondary.PermissionIndex.Enabled:
+    permission_index = PermissionIndex(regulator_repo, config.Adapters.Secondary.PermissionIndex)
+
+handler = Handler(admin_provider, regulator_repo, permission_index)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -24,8 +30,16 @@ logging.basicConfig(
     ]
 )
 
+if permission_index:
+    permission_index.start()
+
+journal = None
+if config.Adapters.Secondary.WebhookJournal.Enabled:
+    journal = WebhookJournal(config.Adapters.Secondary.WebhookJournal)
+
 http_adapter = run_http_adapter(
     handler=handler,
     config=config.Adapters.Primary.HttpAdapter,
+    journal=journal,
 )
 